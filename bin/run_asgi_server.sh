@@ -0,0 +1,8 @@
+#!/bin/bash
+
+
+if [ -d "venv" ]; then
+    source venv/bin/activate
+fi
+
+python -m uvicorn recoco_sync.asgi:application --host 0.0.0.0 --port "${PORT:-8002}" --workers "${WEB_CONCURRENCY:-2}"
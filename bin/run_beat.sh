@@ -0,0 +1,8 @@
+#!/bin/bash
+
+
+if [ -d "venv" ]; then
+    source venv/bin/activate
+fi
+
+python -m celery -A recoco_sync.worker beat -l INFO
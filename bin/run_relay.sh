@@ -0,0 +1,8 @@
+#!/bin/bash
+
+
+if [ -d "venv" ]; then
+    source venv/bin/activate
+fi
+
+python manage.py relay_webhook_events
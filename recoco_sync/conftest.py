@@ -3,6 +3,12 @@ from __future__ import annotations
 import httpx
 import pytest
 from django.conf import settings
+from django.core.cache import cache
+
+from recoco_sync.main.catalogue import clear_question_catalogues
+from recoco_sync.main.clients import close_http_clients
+from recoco_sync.main.lookups import webhook_config_cache
+from recoco_sync.main.tokens import get_token_store
 
 
 @pytest.fixture
@@ -189,11 +195,21 @@ def questions_payload_object():
     }
 
 
+@pytest.fixture(autouse=True)
+def reset_http_clients():
+    yield
+    close_http_clients()
+    get_token_store().clear()
+    clear_question_catalogues()
+    cache.clear()
+    webhook_config_cache.invalidate()
+
+
 @pytest.fixture(autouse=True)
 def mock_recoco_client_httpx_responses(respx_mock, questions_payload_object):
     respx_mock.post(f"{settings.RECOCO_API_URL_EXAMPLE}/token/").mock(
         return_value=httpx.Response(200, json={"access": "token"})
     )
-    respx_mock.get(f"{settings.RECOCO_API_URL_EXAMPLE}/survey/questions/?limit=500").mock(
+    respx_mock.get(f"{settings.RECOCO_API_URL_EXAMPLE}/survey/questions/").mock(
         return_value=httpx.Response(200, json=questions_payload_object)
     )
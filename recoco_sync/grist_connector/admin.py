@@ -54,6 +54,7 @@ class GristConfigAdmin(admin.ModelAdmin):
         "name",
         "related_webhook_config",
         "enabled",
+        "last_synced_at",
     )
 
     list_filter = ("enabled",)
@@ -6,3 +6,6 @@ from django.apps import AppConfig
 class GristConnectorConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "recoco_sync.grist_connector"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -4,8 +4,12 @@ import json
 import logging
 from typing import Any, Self
 
+from django.conf import settings
 from httpx import Client, Response
 
+from recoco_sync.main.clients import get_http_client
+from recoco_sync.main.ratelimit import RateLimit
+
 from .models import GristConfig
 
 logger = logging.getLogger(__name__)
@@ -23,11 +27,18 @@ class GristApiClient:
 
     _client: Client
 
-    def __init__(self, api_key: str, api_base_url: str, doc_id: str):
+    def __init__(
+        self, api_key: str, api_base_url: str, doc_id: str, rate_limit: RateLimit | None = None
+    ):
         self.api_key = api_key
         self.api_base_url = api_base_url
         self.doc_id = doc_id
-        self._client = Client(
+        rate_limit = rate_limit or RateLimit(
+            settings.GRIST_API_RATE_LIMIT, settings.GRIST_API_RATE_LIMIT_BURST
+        )
+        self._client = get_http_client(
+            (self.api_base_url, self.api_key, rate_limit),
+            rate_limit=rate_limit,
             headers=self.headers,
             base_url=self.api_base_url,
             event_hooks={"response": [raise_on_4xx_5xx]},
@@ -39,6 +50,7 @@ class GristApiClient:
             api_key=config.api_key,
             api_base_url=config.api_url,
             doc_id=config.doc_id,
+            rate_limit=config.get_rate_limit(),
         )
 
     @property
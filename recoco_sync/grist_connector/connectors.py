@@ -6,6 +6,7 @@ from typing import Any, assert_never
 from django.conf import settings
 from django.db import transaction
 
+from recoco_sync.main.catalogue import CatalogueQuestion, get_question_catalogue
 from recoco_sync.main.choices import ObjectType
 from recoco_sync.main.connectors import Connector
 from recoco_sync.main.models import WebhookEvent
@@ -14,7 +15,8 @@ from recoco_sync.main.utils import QuestionType, get_question_type
 from .choices import GristColumnType
 from .clients import GristApiClient
 from .constants import project_columns_spec
-from .models import GristColumn, GristConfig
+from .models import GristColumn, GristConfig, GristRecordHash
+from .projections import get_grist_projection, grist_columns_change
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +31,9 @@ class GristConnector(Connector):
         for config in GristConfig.objects.filter(
             enabled=True, webhook_config_id=event.webhook_config.pk
         ):
-            for _, project_data in self.fetch_projects_data(project_ids=[object_id], config=config):
+            for _, project_data in self.fetch_projects_data(
+                project_ids=[object_id], event=event, config=config
+            ):
                 self.update_or_create_project_record(
                     config=config, project_id=object_id, project_data=project_data
                 )
@@ -39,60 +43,65 @@ class GristConnector(Connector):
         return super().get_recoco_api_client(api_url=config.webhook_config.api_url)
 
     def map_from_project_payload_object(self, payload, **kwargs):
-        config: GristConfig = kwargs.get("config")
-        if not len(config.table_headers):
+        projection = get_grist_projection(kwargs.get("config"))
+        if projection.is_empty:
             return {}
 
         data = super().map_from_project_payload_object(payload, **kwargs)
-        return {k: data[k] for k in config.table_headers if k in data}
+        return projection.project(data)
 
     def map_from_survey_answer_payload_object(self, payload, **kwargs):
-        config: GristConfig = kwargs.get("config")
-        if not len(config.table_headers):
+        projection = get_grist_projection(kwargs.get("config"))
+        if projection.is_empty:
             return {}
 
         data = super().map_from_survey_answer_payload_object(payload, **kwargs)
-        return {k: data[k] for k in config.table_headers if k in data}
+        return projection.project(data)
 
     @transaction.atomic
     def update_or_create_columns(self, config: GristConfig, **kwargs):
-        GristColumn.objects.filter(grist_config=config).delete()
-
-        for col_id, col_spec in project_columns_spec.items():
-            GristColumn.objects.create(
-                grist_config=config,
-                col_id=col_id,
-                label=col_spec["label"],
-                type=col_spec["type"],
-            )
-
-        questions = self.get_recoco_api_client(config=config).get_questions()
-        for question in questions.get("results"):
-            question_col_id = question.get("slug").replace("-", "_")
-            question_col_label = self.get_column_label_from_payload(question)
-
-            GristColumn.objects.get_or_create(
-                grist_config=config,
-                col_id=question_col_id,
-                defaults={
-                    "label": question_col_label,
-                    "type": self.get_column_type_from_payload(question),
-                },
-            )
-
-            if get_question_type(question) != QuestionType.SIMPLE:
+        with grist_columns_change(config.pk):
+            GristColumn.objects.filter(grist_config=config).delete()
+            GristRecordHash.objects.filter(grist_config=config).delete()
+
+            for col_id, col_spec in project_columns_spec.items():
+                GristColumn.objects.create(
+                    grist_config=config,
+                    col_id=col_id,
+                    label=col_spec["label"],
+                    type=col_spec["type"],
+                )
+
+            question_catalogue = get_question_catalogue(self.get_recoco_api_client(config=config))
+            for question in question_catalogue:
+                question_col_label = self.truncate_column_label(question.label)
+
                 GristColumn.objects.get_or_create(
                     grist_config=config,
-                    col_id=f"{question_col_id}_comment",
+                    col_id=question.col_id,
                     defaults={
-                        "label": f"Commentaire de {question_col_label}",
-                        "type": GristColumnType.TEXT,
+                        "label": question_col_label,
+                        "type": self.get_column_type(question.question_type),
                     },
                 )
 
+                if question.question_type != QuestionType.SIMPLE:
+                    GristColumn.objects.get_or_create(
+                        grist_config=config,
+                        col_id=f"{question.col_id}_comment",
+                        defaults={
+                            "label": f"Commentaire de {question_col_label}",
+                            "type": GristColumnType.TEXT,
+                        },
+                    )
+
+    @classmethod
+    def get_column_type_from_payload(cls, question: dict[str, Any]) -> GristColumnType:
+        return cls.get_column_type(get_question_type(question))
+
     @staticmethod
-    def get_column_type_from_payload(question: dict[str, Any]) -> GristColumnType:
-        match get_question_type(question):
+    def get_column_type(question_type: QuestionType) -> GristColumnType:
+        match question_type:
             case QuestionType.SIMPLE:
                 return GristColumnType.TEXT
             case QuestionType.YES_NO:
@@ -104,28 +113,73 @@ class GristConnector(Connector):
             case QuestionType.MULTIPLE_CHOICES:
                 return GristColumnType.CHOICE_LIST
             case _:
-                assert_never(question)
+                assert_never(question_type)
+
+    @classmethod
+    def get_column_label_from_payload(cls, question: dict[str, Any]) -> str:
+        return cls.truncate_column_label(CatalogueQuestion.from_payload(question).label)
 
     @staticmethod
-    def get_column_label_from_payload(question: dict[str, Any]) -> str:
-        col_label = (
-            question.get("text_short")
-            or question.get("text")
-            or question.get("slug").replace("_", " ").title()
-        )
+    def truncate_column_label(col_label: str) -> str:
         if len(col_label) > settings.TABLE_COLUMN_HEADER_MAX_LENGTH:
             col_label = f"{col_label[: settings.TABLE_COLUMN_HEADER_MAX_LENGTH - 3]}..."
         return col_label
 
-    @staticmethod
-    def update_or_create_project_record(config: GristConfig, project_id: int, project_data: dict):
+    @classmethod
+    def update_or_create_project_record(
+        cls, config: GristConfig, project_id: int, project_data: dict
+    ) -> None:
         """
         Update a record related to a given project on Grist side,
         or create it if it doesn't exist.
         """
 
+        cls.update_or_create_project_records(config=config, records=[(project_id, project_data)])
+
+    @staticmethod
+    def update_or_create_project_records(
+        config: GristConfig, records: list[tuple[int, dict]]
+    ) -> None:
+        """
+        Update the records related to the given projects on Grist side, or create those
+        which don't exist, in a single request.
+        Projects whose data did not change since the last push are skipped.
+        """
+
+        hashes = {
+            project_id: GristRecordHash.compute(project_data)
+            for project_id, project_data in records
+        }
+        pushed_hashes = dict(
+            GristRecordHash.objects.filter(
+                grist_config=config, project_id__in=hashes.keys()
+            ).values_list("project_id", "data_hash")
+        )
+        records = [
+            (project_id, project_data)
+            for project_id, project_data in records
+            if pushed_hashes.get(project_id) != hashes[project_id]
+        ]
+        if not records:
+            return
+
         client = GristApiClient.from_config(config)
 
         client.update_or_create_records(
-            table_id=config.table_id, filters_fields=[({"object_id": project_id}, project_data)]
+            table_id=config.table_id,
+            filters_fields=[
+                ({"object_id": project_id}, project_data) for project_id, project_data in records
+            ],
+        )
+
+        GristRecordHash.objects.bulk_create(
+            [
+                GristRecordHash(
+                    grist_config=config, project_id=project_id, data_hash=hashes[project_id]
+                )
+                for project_id, _ in records
+            ],
+            update_conflicts=True,
+            unique_fields=["grist_config", "project_id"],
+            update_fields=["data_hash", "modified"],
         )
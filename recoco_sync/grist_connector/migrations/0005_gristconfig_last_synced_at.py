@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:58
+
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("grist_connector", "0004_alter_gristcolumn_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gristconfig",
+            name="last_synced_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Début de la dernière synchronisation complète réussie de la table",
+                null=True,
+                verbose_name="Dernière synchronisation",
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:59
+
+from __future__ import annotations
+
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("grist_connector", "0005_gristconfig_last_synced_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GristRecordHash",
+            fields=[
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="created"
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="modified"
+                    ),
+                ),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                ("project_id", models.IntegerField()),
+                ("data_hash", models.CharField(max_length=64)),
+                (
+                    "grist_config",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="record_hashes",
+                        to="grist_connector.gristconfig",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Grist record hash",
+                "verbose_name_plural": "Grist record hashes",
+                "db_table": "gristrecordhash",
+                "unique_together": {("grist_config", "project_id")},
+            },
+        ),
+    ]
@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from typing import Any
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
-from recoco_sync.main.models import WebhookConfig
+from recoco_sync.main.models import RateLimitedConfig, WebhookConfig
 from recoco_sync.utils.models import BaseModel
 
 from .choices import GristColumnType
 
 
-class GristConfig(BaseModel):
+class GristConfig(RateLimitedConfig, BaseModel):
+    default_rate_limit_setting = "GRIST_API_RATE_LIMIT"
+
     name = models.CharField(max_length=255, verbose_name="Nom de la configuration")
 
     doc_id = models.CharField(max_length=32)
@@ -27,6 +32,13 @@ class GristConfig(BaseModel):
         related_name="grist_configs",
     )
 
+    last_synced_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Dernière synchronisation",
+        help_text="Début de la dernière synchronisation complète réussie de la table",
+    )
+
     class Meta:
         db_table = "gristconfig"
         ordering = ("-created",)
@@ -49,10 +61,6 @@ class GristConfig(BaseModel):
             for column in self.columns.all()
         ]
 
-    @property
-    def table_headers(self) -> list[str]:
-        return list(self.columns.values_list("col_id", flat=True))
-
     def __str__(self) -> str:
         return self.name or self.doc_id
 
@@ -88,3 +96,31 @@ class GristColumn(BaseModel):
 
     def __str__(self) -> str:
         return self.label
+
+
+class GristRecordHash(BaseModel):
+    """Hash of the last data pushed to Grist for a project, to skip no-op writes."""
+
+    grist_config = models.ForeignKey(
+        GristConfig,
+        on_delete=models.CASCADE,
+        related_name="record_hashes",
+    )
+
+    project_id = models.IntegerField()
+
+    data_hash = models.CharField(max_length=64)
+
+    class Meta:
+        db_table = "gristrecordhash"
+        verbose_name = "Grist record hash"
+        verbose_name_plural = "Grist record hashes"
+        unique_together = [
+            ("grist_config", "project_id"),
+        ]
+
+    @staticmethod
+    def compute(project_data: dict[str, Any]) -> str:
+        return hashlib.sha256(
+            json.dumps(project_data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+        ).hexdigest()
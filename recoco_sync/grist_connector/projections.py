@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+from collections.abc import Generator
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, NamedTuple
+from uuid import UUID
+
+from django.utils import timezone
+
+from .models import GristConfig
+
+
+class GristProjection(NamedTuple):
+    """Columns of a Grist config, compiled once to project mapped data without DB access."""
+
+    col_ids: tuple[str, ...]
+    col_id_set: frozenset[str]
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.col_ids
+
+    def project(self, data: dict[str, Any]) -> dict[str, Any]:
+        return {k: data[k] for k in self.col_ids if k in data}
+
+
+_projections: dict[UUID, tuple[datetime, GristProjection]] = {}
+_projections_lock = threading.Lock()
+
+_columns_changing: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "columns_changing", default=False
+)
+
+
+def get_grist_projection(config: GristConfig) -> GristProjection:
+    """
+    Return the compiled projection of a config. It is cached per process, and versioned by
+    the config modification date, which is bumped whenever a column changes.
+    """
+
+    cached = _projections.get(config.pk)
+    if cached is not None and cached[0] == config.modified:
+        return cached[1]
+
+    col_ids = tuple(column.col_id for column in config.columns.all())
+    projection = GristProjection(col_ids=col_ids, col_id_set=frozenset(col_ids))
+    with _projections_lock:
+        _projections[config.pk] = (config.modified, projection)
+    return projection
+
+
+def invalidate_grist_projection(config_id: UUID) -> None:
+    with _projections_lock:
+        _projections.pop(config_id, None)
+
+
+def touch_grist_config(config_id: UUID) -> None:
+    """Bump the config version, so that every process recompiles its projection."""
+
+    GristConfig.objects.filter(pk=config_id).update(modified=timezone.now())
+    invalidate_grist_projection(config_id)
+
+
+def is_grist_columns_changing() -> bool:
+    return _columns_changing.get()
+
+
+@contextmanager
+def grist_columns_change(config_id: UUID) -> Generator[None]:
+    """Group the column changes of a config, so that its version is bumped once at the end."""
+
+    token = _columns_changing.set(True)
+    try:
+        yield
+    finally:
+        _columns_changing.reset(token)
+    touch_grist_config(config_id)
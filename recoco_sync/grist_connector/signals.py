@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import GristColumn
+from .projections import is_grist_columns_changing, touch_grist_config
+
+
+@receiver(post_save, sender=GristColumn)
+@receiver(post_delete, sender=GristColumn)
+def on_grist_column_change(sender, instance: GristColumn, **kwargs):
+    # the bulk changes bump the config version once they are done
+    if not is_grist_columns_changing():
+        touch_grist_config(instance.grist_config_id)
@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+import json
+from collections.abc import Callable, Generator, Iterable
+from functools import partial
 from typing import Any
 
 from celery import shared_task
 from celery.utils.log import get_task_logger
-from httpx import HTTPError
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from httpx import HTTPError, HTTPStatusError, TimeoutException
 
 from .clients import GristApiClient
 from .connectors import GristConnector
-from .models import GristConfig
+from .models import GristConfig, GristRecordHash
 
 logger = get_task_logger(__name__)
 
@@ -21,6 +27,8 @@ def populate_grist_table(config_id: str):
         logger.error(f"GristConfig with id={config_id} does not exist")
         return
 
+    sync_started_at = timezone.now()
+    GristRecordHash.objects.filter(grist_config=config).delete()
     grist_client = GristApiClient.from_config(config)
 
     grist_client.create_table(
@@ -28,81 +36,183 @@ def populate_grist_table(config_id: str):
         columns=config.table_columns,
     )
 
-    batch_records = []
-    batch_size = 100
-    batch_errors = []
+    # records are created blindly: a timed out batch may have been committed by Grist
+    batch_errors = _send_in_batches(
+        GristConnector().fetch_projects_data(config=config),
+        send=partial(_create_project_records, grist_client, config.table_id),
+        idempotent=False,
+    )
 
-    for project_id, project_data in GristConnector().fetch_projects_data(config=config):
-        batch_records.append({"object_id": project_id} | project_data)
+    if len(batch_errors):
+        logger.error(f"Grist {config.name}, creation failures: {batch_errors}.")
+        return
 
-        if len(batch_records) > batch_size - 1:
-            batch_errors += _batch_create_records(
-                grist_client=grist_client,
-                table_id=config.table_id,
-                records=batch_records,
-            )
-            batch_records = []
+    config.last_synced_at = sync_started_at
+    config.save(update_fields=["last_synced_at"])
 
-    if len(batch_records) > 0:
-        batch_errors += _batch_create_records(
-            grist_client=grist_client,
-            table_id=config.table_id,
-            records=batch_records,
-        )
 
-    if len(batch_errors):
-        logger.error(f"Grist {config.name}, creation failures: {batch_errors}.")
+def _create_project_records(
+    grist_client: GristApiClient, table_id: str, batch: list[tuple[int, dict[str, Any]]]
+) -> None:
+    grist_client.create_records(
+        table_id=table_id,
+        records=[{"object_id": project_id} | project_data for project_id, project_data in batch],
+    )
+
+
+class AdaptiveBatchSize:
+    """
+    Size of the batches sent to Grist, doubled after each successful full batch and halved
+    when Grist rejects a payload as too large or times out.
+    """
+
+    def __init__(self, initial: int | None = None, maximum: int | None = None):
+        self.maximum = maximum or settings.GRIST_BATCH_MAX_SIZE
+        self.value = min(initial or settings.GRIST_BATCH_SIZE, self.maximum)
+
+    def grow(self) -> None:
+        self.value = min(self.value * 2, self.maximum)
+
+    def shrink(self) -> None:
+        self.value = max(self.value // 2, 1)
+
+
+def _is_payload_rejected(err: HTTPError) -> bool:
+    return isinstance(err, HTTPStatusError) and err.response.status_code in (400, 413)
+
+
+def _iter_batches(
+    items: Iterable[tuple[int, dict[str, Any]]],
+    batch_size: AdaptiveBatchSize,
+    max_bytes: int | None = None,
+) -> Generator[list[tuple[int, dict[str, Any]]]]:
+    """
+    Group (project_id, project_data) items into batches bounded in length and JSON size.
+    The batch size is read again for each batch, so that it can adapt while iterating.
+    """
+
+    max_bytes = max_bytes or settings.GRIST_BATCH_MAX_BYTES
+
+    batch, batch_bytes = [], 0
+    for item in items:
+        item_bytes = len(json.dumps(item[1], cls=DjangoJSONEncoder))
+        if batch and (len(batch) >= batch_size.value or batch_bytes + item_bytes > max_bytes):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(item)
+        batch_bytes += item_bytes
 
+    if batch:
+        yield batch
 
-def _batch_create_records(
-    grist_client: GristApiClient, table_id: str, records: list[dict[str, Any]]
+
+def _bisect_batch(
+    send: Callable[[list[tuple[int, dict[str, Any]]]], Any],
+    batch: list[tuple[int, dict[str, Any]]],
+    batch_size: AdaptiveBatchSize,
+    *,
+    idempotent: bool = True,
 ) -> list[dict[str, Any]]:
-    errors = []
+    """
+    Send a batch of (project_id, project_data) items. If Grist rejects the payload, split
+    the batch in halves and retry them recursively, until the failing items are isolated.
+    A timed out batch is retried the same way only when sending it is `idempotent`, and
+    reported as failed otherwise. Any other error is raised.
+    """
 
     try:
-        grist_client.create_records(table_id=table_id, records=records)
-    except HTTPError:
-        pass
-    else:
-        return errors
+        send(batch)
+    except HTTPError as err:
+        if isinstance(err, TimeoutException):
+            batch_size.shrink()
+            if not idempotent:
+                return [{"project_id": project_id, "error": str(err)} for project_id, _ in batch]
+        elif _is_payload_rejected(err):
+            if err.response.status_code == 413:
+                batch_size.shrink()
+        else:
+            raise
+
+        if len(batch) == 1:
+            return [{"project_id": batch[0][0], "error": str(err)}]
+
+        middle = len(batch) // 2
+        return [
+            *_bisect_batch(send, batch[:middle], batch_size, idempotent=idempotent),
+            *_bisect_batch(send, batch[middle:], batch_size, idempotent=idempotent),
+        ]
+
+    return []
+
+
+def _send_in_batches(
+    items: Iterable[tuple[int, dict[str, Any]]],
+    send: Callable[[list[tuple[int, dict[str, Any]]]], Any],
+    *,
+    idempotent: bool = True,
+) -> list[dict[str, Any]]:
+    """
+    Send the items in adaptive batches and return the errors of the failing items.
+    An error other than a rejected payload or a timeout, such as an authentication error
+    or an outage of Grist, stops the sending.
+    """
 
-    for record in records:
+    batch_size = AdaptiveBatchSize()
+    errors = []
+    for batch in _iter_batches(items, batch_size=batch_size):
+        current_size = batch_size.value
         try:
-            grist_client.create_records(table_id=table_id, records=[record])
+            batch_errors = _bisect_batch(send, batch, batch_size, idempotent=idempotent)
         except HTTPError as err:
-            errors.append(
-                {
-                    "project_id": record.get("object_id"),
-                    "error": str(err),
-                }
-            )
-
+            logger.warning(f"Grist batch failed, remaining batches skipped: {err}")
+            return errors + [
+                {"project_id": project_id, "error": str(err)} for project_id, _ in batch
+            ]
+        if not batch_errors and len(batch) >= current_size == batch_size.value:
+            batch_size.grow()
+        errors += batch_errors
     return errors
 
 
 @shared_task
-def refresh_grist_table(config_id: str):
+def refresh_grist_table(config_id: str, *, incremental: bool = False):
+    """
+    Push the projects to the Grist table. In incremental mode, only the projects modified
+    since the last successful synchronisation are pushed.
+    """
+
     try:
         config = GristConfig.objects.get(id=config_id)
     except GristConfig.DoesNotExist:
         logger.error(f"GristConfig with id={config_id} does not exist")
         return
 
-    errors = []
+    sync_started_at = timezone.now()
     grist_connector = GristConnector()
 
-    for project_id, project_data in grist_connector.fetch_projects_data(config=config):
-        try:
-            grist_connector.update_or_create_project_record(
-                config=config, project_id=project_id, project_data=project_data
-            )
-        except HTTPError as err:
-            errors.append(
-                {
-                    "project_id": project_id,
-                    "error": str(err),
-                }
-            )
+    fetch_kwargs = {"config": config}
+    if incremental and config.last_synced_at:
+        fetch_kwargs["modified_since"] = config.last_synced_at
+    elif not incremental:
+        # a full refresh pushes every project, even those that seem up to date
+        GristRecordHash.objects.filter(grist_config=config).delete()
+
+    errors = _send_in_batches(
+        grist_connector.fetch_projects_data(**fetch_kwargs),
+        send=partial(grist_connector.update_or_create_project_records, config),
+    )
 
     if errors:
         logger.error(f"Grist {config.name}, update failures: {errors}.")
+        return
+
+    config.last_synced_at = sync_started_at
+    config.save(update_fields=["last_synced_at"])
+
+
+@shared_task
+def refresh_grist_tables():
+    """Incremental refresh of all the enabled Grist tables, run periodically."""
+
+    for config_id in GristConfig.objects.filter(enabled=True).values_list("id", flat=True):
+        refresh_grist_table.delay(config_id, incremental=True)
@@ -6,6 +6,7 @@ import pytest
 
 from recoco_sync.grist_connector.choices import GristColumnType
 from recoco_sync.grist_connector.connectors import GristConnector
+from recoco_sync.grist_connector.models import GristRecordHash
 from recoco_sync.main.utils import QuestionType
 
 from .factories import GristConfigFactory
@@ -66,3 +67,26 @@ class TestGristConnector:
             return_value=question_type,
         ):
             assert GristConnector.get_column_type_from_payload(question_type) == expected_grist_type
+
+    def test_update_or_create_project_records_skips_unchanged(self):
+        config = GristConfigFactory()
+
+        with patch(
+            "recoco_sync.grist_connector.connectors.GristApiClient.update_or_create_records"
+        ) as mock_update_or_create_records:
+            GristConnector.update_or_create_project_records(
+                config, [(1, {"name": "a"}), (2, {"name": "b"})]
+            )
+            GristConnector.update_or_create_project_records(
+                config, [(1, {"name": "a"}), (2, {"name": "c"})]
+            )
+            GristConnector.update_or_create_project_records(config, [(2, {"name": "c"})])
+
+        assert mock_update_or_create_records.call_count == 2
+        assert mock_update_or_create_records.call_args.kwargs["filters_fields"] == [
+            ({"object_id": 2}, {"name": "c"}),
+        ]
+        assert GristRecordHash.objects.filter(grist_config=config).count() == 2
+        assert GristRecordHash.objects.get(
+            grist_config=config, project_id=2
+        ).data_hash == GristRecordHash.compute({"name": "c"})
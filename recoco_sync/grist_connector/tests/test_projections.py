@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recoco_sync.grist_connector.models import GristConfig
+from recoco_sync.grist_connector.projections import get_grist_projection, grist_columns_change
+
+from .factories import GristColumnFactory, GristConfigFactory
+
+
+@pytest.mark.django_db
+def test_get_grist_projection(django_assert_num_queries):
+    config = GristConfigFactory()
+    GristColumnFactory(grist_config=config, col_id="name")
+    GristColumnFactory(grist_config=config, col_id="city")
+    config.refresh_from_db()
+
+    with django_assert_num_queries(1):
+        projection = get_grist_projection(config)
+        assert get_grist_projection(config) is projection
+
+    assert projection.col_ids == ("name", "city")
+    assert projection.project({"city": "Nantes", "name": "Pôle", "other": 1}) == {
+        "name": "Pôle",
+        "city": "Nantes",
+    }
+
+
+@pytest.mark.django_db
+def test_get_grist_projection_invalidated_on_column_change():
+    config = GristConfigFactory()
+    column = GristColumnFactory(grist_config=config, col_id="name")
+    assert get_grist_projection(config).col_ids == ("name",)
+
+    GristColumnFactory(grist_config=config, col_id="city")
+    assert get_grist_projection(config).col_ids == ("name", "city")
+
+    column.delete()
+    # another process would see the config modified date bumped
+    assert GristConfig.objects.get(pk=config.pk).modified > config.modified
+    assert get_grist_projection(GristConfig.objects.get(pk=config.pk)).col_ids == ("city",)
+
+
+@pytest.mark.django_db
+def test_grist_columns_change_bumps_version_once():
+    config = GristConfigFactory()
+    column = GristColumnFactory(grist_config=config, col_id="name")
+    assert get_grist_projection(config).col_ids == ("name",)
+
+    with CaptureQueriesContext(connection) as queries, grist_columns_change(config.pk):
+        column.delete()
+        for col_id in ("city", "region", "department"):
+            GristColumnFactory(grist_config=config, col_id=col_id)
+
+    config_updates = [q for q in queries if q["sql"].startswith('UPDATE "gristconfig"')]
+    assert len(config_updates) == 1
+    assert get_grist_projection(GristConfig.objects.get(pk=config.pk)).col_ids == (
+        "city",
+        "region",
+        "department",
+    )
@@ -1,10 +1,20 @@
 from __future__ import annotations
 
+from datetime import timedelta
 from unittest.mock import patch
 
+import httpx
 import pytest
+from django.utils import timezone
 
-from recoco_sync.grist_connector.tasks import populate_grist_table, refresh_grist_table
+from recoco_sync.grist_connector.tasks import (
+    AdaptiveBatchSize,
+    _iter_batches,
+    _send_in_batches,
+    populate_grist_table,
+    refresh_grist_table,
+    refresh_grist_tables,
+)
 
 from .factories import GristConfigFactory
 
@@ -28,12 +38,12 @@ class TestRefreshGristTable:
             "GristConfig with id=40d26f87-8b91-4670-a196-bfdcbc39eabb does not exist"
         )
 
-    @patch("recoco_sync.grist_connector.connectors.GristConnector.update_or_create_project_record")
+    @patch("recoco_sync.grist_connector.connectors.GristConnector.update_or_create_project_records")
     @patch("recoco_sync.grist_connector.connectors.GristConnector.fetch_projects_data")
-    def test_update_or_create_project_record_call(
+    def test_update_or_create_project_records_call(
         self,
         mock_fetch_projects_data,
-        mock_update_or_create_project_record,
+        mock_update_or_create_project_records,
     ):
         mock_fetch_projects_data.return_value = [("project_id", {"project_data": "data"})]
 
@@ -42,8 +52,184 @@ class TestRefreshGristTable:
 
         mock_fetch_projects_data.assert_called_once_with(config=config)
 
-        mock_update_or_create_project_record.assert_called_once_with(
-            config=config,
-            project_id="project_id",
-            project_data={"project_data": "data"},
+        mock_update_or_create_project_records.assert_called_once_with(
+            config,
+            [("project_id", {"project_data": "data"})],
         )
+
+    @patch("recoco_sync.grist_connector.connectors.GristConnector.update_or_create_project_records")
+    @patch("recoco_sync.grist_connector.connectors.GristConnector.fetch_projects_data")
+    def test_incremental_refresh(
+        self,
+        mock_fetch_projects_data,
+        mock_update_or_create_project_records,
+    ):
+        mock_fetch_projects_data.return_value = []
+        last_synced_at = timezone.now() - timedelta(days=1)
+        config = GristConfigFactory(last_synced_at=last_synced_at)
+
+        refresh_grist_table(config_id=config.id, incremental=True)
+
+        mock_fetch_projects_data.assert_called_once_with(
+            config=config, modified_since=last_synced_at
+        )
+        config.refresh_from_db()
+        assert config.last_synced_at > last_synced_at
+
+    @patch("recoco_sync.grist_connector.connectors.GristConnector.update_or_create_project_records")
+    @patch("recoco_sync.grist_connector.connectors.GristConnector.fetch_projects_data")
+    def test_failing_records_are_isolated(
+        self,
+        mock_fetch_projects_data,
+        mock_update_or_create_project_records,
+        settings,
+    ):
+        settings.GRIST_BATCH_SIZE = 8
+        mock_fetch_projects_data.return_value = [(i, {"name": f"project {i}"}) for i in range(8)]
+
+        def update_or_create_project_records(config, records):
+            if any(project_id == 5 for project_id, _ in records):
+                raise httpx.HTTPStatusError(
+                    "Bad record",
+                    request=httpx.Request("POST", "https://grist.example.com"),
+                    response=httpx.Response(400),
+                )
+
+        mock_update_or_create_project_records.side_effect = update_or_create_project_records
+
+        config = GristConfigFactory()
+        with patch("recoco_sync.grist_connector.tasks.logger.error") as logger_mock:
+            refresh_grist_table(config_id=config.id)
+
+        # 1 batch of 8, then halves of 4 and 2 records down to the failing one
+        assert mock_update_or_create_project_records.call_count == 7
+        logger_mock.assert_called_once_with(
+            f"Grist {config.name}, update failures: {[{'project_id': 5, 'error': 'Bad record'}]}."
+        )
+
+        # the high-water mark is not moved forward when some records failed
+        config.refresh_from_db()
+        assert config.last_synced_at is None
+
+
+@pytest.mark.django_db
+def test_refresh_grist_tables():
+    config = GristConfigFactory()
+    GristConfigFactory(enabled=False)
+
+    with patch("recoco_sync.grist_connector.tasks.refresh_grist_table.delay") as mock_delay:
+        refresh_grist_tables()
+
+    mock_delay.assert_called_once_with(config.id, incremental=True)
+
+
+@pytest.mark.parametrize(
+    "batch_size,max_bytes,expected_lengths",
+    [
+        (2, 1000, [2, 2, 1]),
+        (10, 1000, [5]),
+        (10, 40, [2, 2, 1]),
+    ],
+)
+def test_iter_batches(batch_size, max_bytes, expected_lengths):
+    items = [(i, {"name": "project"}) for i in range(5)]
+    batches = list(
+        _iter_batches(items, batch_size=AdaptiveBatchSize(batch_size), max_bytes=max_bytes)
+    )
+    assert [len(batch) for batch in batches] == expected_lengths
+    assert [item for batch in batches for item in batch] == items
+
+
+def test_adaptive_batch_size():
+    batch_size = AdaptiveBatchSize(initial=100, maximum=300)
+    batch_size.grow()
+    assert batch_size.value == 200
+    batch_size.grow()
+    assert batch_size.value == 300
+    for _ in range(10):
+        batch_size.shrink()
+    assert batch_size.value == 1
+
+
+def test_send_in_batches_adapts_batch_size(settings):
+    settings.GRIST_BATCH_SIZE = 4
+    settings.GRIST_BATCH_MAX_SIZE = 8
+    request = httpx.Request("POST", "https://grist.example.com")
+    sent_batches = []
+
+    def send(batch):
+        if len(batch) > 4:
+            raise httpx.HTTPStatusError(
+                "Payload too large", request=request, response=httpx.Response(413)
+            )
+        sent_batches.append([project_id for project_id, _ in batch])
+
+    items = [(i, {"name": f"project {i}"}) for i in range(20)]
+
+    assert _send_in_batches(items, send=send) == []
+    # 4 succeeds and grows to 8, 8 is rejected and halved, the size shrinks back to 4
+    assert sent_batches == [
+        [0, 1, 2, 3],
+        [4, 5, 6, 7],
+        [8, 9, 10, 11],
+        [12, 13, 14, 15],
+        [16, 17, 18, 19],
+    ]
+
+
+def _grist_error(status_code: int) -> httpx.HTTPStatusError:
+    return httpx.HTTPStatusError(
+        f"Error {status_code}",
+        request=httpx.Request("POST", "https://grist.example.com"),
+        response=httpx.Response(status_code),
+    )
+
+
+@pytest.mark.parametrize("status_code", [401, 503])
+def test_send_in_batches_fails_fast(settings, status_code):
+    settings.GRIST_BATCH_SIZE = 4
+    sent_batches = []
+
+    def send(batch):
+        sent_batches.append(batch)
+        raise _grist_error(status_code)
+
+    items = [(i, {"name": f"project {i}"}) for i in range(8)]
+
+    errors = _send_in_batches(items, send=send)
+
+    assert len(sent_batches) == 1
+    assert [error["project_id"] for error in errors] == [0, 1, 2, 3]
+
+
+def test_send_in_batches_does_not_resend_timed_out_creations(settings):
+    settings.GRIST_BATCH_SIZE = 4
+    sent_batches = []
+
+    def send(batch):
+        sent_batches.append([project_id for project_id, _ in batch])
+        if len(sent_batches) == 1:
+            raise httpx.ReadTimeout("Timed out")
+
+    items = [(i, {"name": f"project {i}"}) for i in range(6)]
+
+    errors = _send_in_batches(items, send=send, idempotent=False)
+
+    # the timed out batch is reported as failed, and the next ones are smaller
+    assert sent_batches == [[0, 1, 2, 3], [4, 5]]
+    assert [error["project_id"] for error in errors] == [0, 1, 2, 3]
+
+
+def test_send_in_batches_resends_timed_out_updates(settings):
+    settings.GRIST_BATCH_SIZE = 4
+    sent_batches = []
+
+    def send(batch):
+        sent_batches.append([project_id for project_id, _ in batch])
+        if len(sent_batches) == 1:
+            raise httpx.ReadTimeout("Timed out")
+
+    items = [(i, {"name": f"project {i}"}) for i in range(4)]
+
+    assert _send_in_batches(items, send=send) == []
+    assert sent_batches == [[0, 1, 2, 3], [0, 1], [2, 3]]
@@ -6,7 +6,8 @@ from typing import Any, Self
 from django.conf import settings
 from httpx import Client, Response
 
-from recoco_sync.main.clients import TokenBearerAuth
+from recoco_sync.main.clients import TokenBearerAuth, get_http_client
+from recoco_sync.main.ratelimit import RateLimit
 
 from .models import LesCommunsConfig
 
@@ -23,16 +24,22 @@ def raise_on_4xx_5xx(response: Response):
 class LesCommunsApiClient:
     _client: Client
 
-    def __init__(self, api_key: str | None = None, *args, **kwargs):
+    def __init__(
+        self, api_key: str | None = None, *args, rate_limit: RateLimit | None = None, **kwargs
+    ):
         _auth = TokenBearerAuth(
             base_url=settings.LESCOMMUNS_API_URL,
             username=settings.LESCOMMUNS_API_USERNAME,
             password=settings.LESCOMMUNS_API_PASSWORD,
+            access_token=api_key or None,
         )
-        if api_key:
-            _auth.access_token = api_key
 
-        self._client = Client(
+        rate_limit = rate_limit or RateLimit(
+            settings.LESCOMMUNS_API_RATE_LIMIT, settings.LESCOMMUNS_API_RATE_LIMIT_BURST
+        )
+        self._client = get_http_client(
+            (settings.LESCOMMUNS_API_URL, settings.LESCOMMUNS_API_USERNAME, api_key, rate_limit),
+            rate_limit=rate_limit,
             auth=_auth,
             base_url=settings.LESCOMMUNS_API_URL,
             event_hooks={"response": [raise_on_4xx_5xx]},
@@ -40,7 +47,7 @@ class LesCommunsApiClient:
 
     @classmethod
     def from_config(cls, config: LesCommunsConfig) -> Self:
-        return cls(api_key=config.api_key)
+        return cls(api_key=config.api_key, rate_limit=config.get_rate_limit())
 
     def list_projects(self) -> list[dict[str, Any]]:
         response = self._client.get("/projets/")
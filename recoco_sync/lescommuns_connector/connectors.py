@@ -30,7 +30,7 @@ class LesCommunsConnector(Connector):
             enabled=True, webhook_config=event.webhook_config
         ):
             _, project_data = next(
-                self.fetch_projects_data(project_ids=[project_id], config=config)
+                self.fetch_projects_data(project_ids=[project_id], event=event, config=config)
             )
 
             project = self.update_or_create_project_record(
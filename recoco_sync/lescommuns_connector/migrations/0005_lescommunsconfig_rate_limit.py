@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:22
+
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("lescommuns_connector", "0004_lescommunsprojet_recommendation_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lescommunsconfig",
+            name="rate_limit",
+            field=models.FloatField(
+                blank=True,
+                help_text="Débit maximal vers l'API, partagé par tous les workers. Valeur par défaut des paramètres si vide, 0 pour ne pas limiter.",
+                null=True,
+                verbose_name="Requêtes par seconde",
+            ),
+        ),
+        migrations.AddField(
+            model_name="lescommunsconfig",
+            name="rate_limit_burst",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Nombre de requêtes pouvant être envoyées d'un coup au-delà du débit.",
+                null=True,
+                verbose_name="Rafale de requêtes",
+            ),
+        ),
+    ]
@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from django.db import models
 
-from recoco_sync.main.models import WebhookConfig
+from recoco_sync.main.models import RateLimitedConfig, WebhookConfig
 from recoco_sync.utils.models import BaseModel
 
 
-class LesCommunsConfig(BaseModel):
+class LesCommunsConfig(RateLimitedConfig, BaseModel):
+    default_rate_limit_setting = "LESCOMMUNS_API_RATE_LIMIT"
+
     name = models.CharField(max_length=255, verbose_name="Nom de la configuration")
 
     webhook_config = models.ForeignKey(
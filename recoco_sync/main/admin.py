@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import Group
+from django.db.models import QuerySet
+from django.http import HttpRequest
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
-from .models import User, WebhookConfig, WebhookEvent
+from .models import User, WebhookConfig, WebhookEvent, WebhookEventRun
+from .replay import reset_events_for_replay, select_events_to_replay
 
 admin.site.unregister(Group)
 
@@ -31,8 +34,21 @@ class WebhookConfigAdmin(admin.ModelAdmin):
         return reverse("api:webhook", kwargs={"code": obj.code})
 
 
+class WebhookEventRunInline(admin.TabularInline):
+    model = WebhookEventRun
+    fields = ("connector", "status", "duration", "request_count", "exception", "modified")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(WebhookEvent)
 class WebhookEventAdmin(admin.ModelAdmin):
+    inlines = (WebhookEventRunInline,)
+
     list_display = (
         "id",
         "webhook_uuid",
@@ -49,6 +65,22 @@ class WebhookEventAdmin(admin.ModelAdmin):
         "status",
     )
 
+    # avoid counting the whole table on each page
+    show_full_result_count = False
+
+    actions = ["replay_events"]
+
+    @admin.action(description="Rejouer les évènements")
+    def replay_events(self, request: HttpRequest, queryset: QuerySet[WebhookEvent]):
+        selection = select_events_to_replay(queryset)
+        reset_events_for_replay(selection, dispatched=False)
+        self.message_user(
+            request,
+            f"{len(selection.event_ids)} évènement(s) seront rejoués, "
+            f"{len(selection.duplicate_event_ids)} doublon(s) ont été regroupés.",
+            messages.SUCCESS,
+        )
+
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
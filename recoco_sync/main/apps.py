@@ -8,6 +8,7 @@ class MainConfig(AppConfig):
     name = "recoco_sync.main"
 
     def ready(self):
+        from . import checks, signals  # noqa: F401
         from .connectors import auto_discover_connectors
 
         auto_discover_connectors()
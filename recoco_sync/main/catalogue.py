@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING, Any, NamedTuple, Self
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .utils import QuestionType, get_question_type
+
+if TYPE_CHECKING:
+    from .clients import RecocoApiClient
+
+
+class CatalogueQuestion(NamedTuple):
+    slug: str
+    col_id: str
+    label: str
+    question_type: QuestionType
+    payload: dict[str, Any]
+
+    @classmethod
+    def from_payload(cls, question: dict[str, Any]) -> Self:
+        slug = str(question.get("slug"))
+        return cls(
+            slug=slug,
+            col_id=slug.replace("-", "_"),
+            label=question.get("text_short")
+            or question.get("text")
+            or slug.replace("_", " ").title(),
+            question_type=get_question_type(question),
+            payload=question,
+        )
+
+
+class QuestionCatalogue:
+    """
+    Survey questions of a Recoco instance, indexed by slug, with their type, column id
+    and label computed once.
+    """
+
+    def __init__(
+        self,
+        questions: Iterable[dict[str, Any]] = (),
+        version: int | None = None,
+        expires_at: float = float("inf"),
+    ):
+        self.version = version
+        self.expires_at = expires_at
+        self._questions: dict[str, CatalogueQuestion] = {}
+        for question in questions:
+            if question.get("slug"):
+                self.get(question)
+
+    def __iter__(self) -> Iterator[CatalogueQuestion]:
+        return iter(list(self._questions.values()))
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def get(self, question: dict[str, Any]) -> CatalogueQuestion:
+        """Return the catalogue entry of a question payload, adding it if unknown."""
+
+        slug = str(question.get("slug"))
+        if (entry := self._questions.get(slug)) is None:
+            entry = self._questions[slug] = CatalogueQuestion.from_payload(question)
+        return entry
+
+    @property
+    def is_expired(self) -> bool:
+        return self.expires_at <= time.monotonic()
+
+
+_catalogues: dict[str, QuestionCatalogue] = {}
+_catalogues_lock = threading.Lock()
+
+
+def _get_cache_key(api_url: str) -> str:
+    return f"recoco-sync:questions:{api_url}"
+
+
+def _get_version_cache_key(api_url: str) -> str:
+    return f"recoco-sync:questions:{api_url}:version"
+
+
+def get_question_catalogue(recoco_client: RecocoApiClient) -> QuestionCatalogue:
+    """
+    Return the question catalogue of the Recoco instance of the given client, i.e. of a
+    WebhookConfig. The questions are downloaded at most once per
+    settings.QUESTION_CATALOGUE_TIMEOUT, and shared across processes through the Django cache.
+    """
+
+    api_url = recoco_client.api_url
+    cache = caches[settings.QUESTION_CATALOGUE_CACHE_ALIAS]
+    timeout = settings.QUESTION_CATALOGUE_TIMEOUT
+
+    version = cache.get_or_set(_get_version_cache_key(api_url), time.time_ns, timeout=None)
+
+    catalogue = _catalogues.get(api_url)
+    if catalogue is not None and catalogue.version == version and not catalogue.is_expired:
+        return catalogue
+
+    questions = cache.get(_get_cache_key(api_url), version=version)
+    if questions is None:
+        questions = list(recoco_client.iter_questions())
+        cache.set(_get_cache_key(api_url), questions, timeout, version=version)
+
+    catalogue = QuestionCatalogue(questions, version=version, expires_at=time.monotonic() + timeout)
+    with _catalogues_lock:
+        _catalogues[api_url] = catalogue
+    return catalogue
+
+
+def invalidate_question_catalogue(api_url: str) -> None:
+    """
+    Force the next catalogue lookup of a Recoco instance to download the questions. The
+    other processes only notice it when settings.QUESTION_CATALOGUE_CACHE_ALIAS is shared
+    by them, otherwise they keep their catalogue until it expires.
+    """
+
+    caches[settings.QUESTION_CATALOGUE_CACHE_ALIAS].set(
+        _get_version_cache_key(api_url), time.time_ns(), timeout=None
+    )
+    with _catalogues_lock:
+        _catalogues.pop(api_url, None)
+
+
+def clear_question_catalogues() -> None:
+    with _catalogues_lock:
+        _catalogues.clear()
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+# Settings of the cache aliases through which the Celery workers share their state
+SHARED_CACHE_ALIAS_SETTINGS = (
+    "WEBHOOK_HYDRATION_CACHE_ALIAS",
+    "QUESTION_CATALOGUE_CACHE_ALIAS",
+    "RATE_LIMIT_CACHE_ALIAS",
+)
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs) -> list[Warning]:
+    """Warn when a cache expected to be shared by the workers is local to each process."""
+
+    if settings.DEBUG:
+        return []
+
+    warnings = []
+    for setting in SHARED_CACHE_ALIAS_SETTINGS:
+        alias = getattr(settings, setting)
+        if isinstance(caches[alias], LocMemCache | DummyCache):
+            warnings.append(
+                Warning(
+                    f"{setting} points to the cache {alias!r}, which is not shared "
+                    "across processes.",
+                    hint="Point it to a shared cache backend, such as Redis (CACHE_URL).",
+                    obj=setting,
+                    id="main.W001",
+                )
+            )
+    return warnings
@@ -8,14 +8,17 @@ class WebhookEventStatus(models.TextChoices):
     PROCESSED = "PROCESSED", "Processed"
     INVALID = "INVALID", "Invalid"
     FAILED = "FAILED", "Failed"
+    COALESCED = "COALESCED", "Coalesced"
+    REPLAYING = "REPLAYING", "Replaying"
 
 
 class ObjectType(models.TextChoices):
     PROJECT = "projects.Project", "Project"
     SURVEY_ANSWER = "survey.Answer", "Answer"
     TAGGEDITEM = "taggit.TaggedItem", "TaggedItem"
+    SURVEY_QUESTION = "survey.Question", "Question"
     RECOMMENDATION = "tasks.Task", "Task"
 
     @property
     def is_project(self) -> bool:
-        return self != self.RECOMMENDATION
+        return self not in (self.RECOMMENDATION, self.SURVEY_QUESTION)
@@ -1,41 +1,193 @@
 from __future__ import annotations
 
+import contextvars
+import logging
+import threading
+import urllib.request
+from collections.abc import Generator, Hashable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
 from typing import Any
 
 from django.conf import settings
-from httpx import Auth, Client, Request, Response
+from httpx import URL, Auth, Client, HTTPStatusError, HTTPTransport, Limits, Request, Response
+
+from .ratelimit import RateLimit, RateLimitedTransport
+from .tokens import Tokens, get_token_key, get_token_store, is_token_expiring
+
+logger = logging.getLogger(__name__)
+
+_http_clients: dict[Hashable, Client] = {}
+_http_clients_lock = threading.Lock()
+
+
+class RequestCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def increment(self) -> None:
+        with self._lock:
+            self.count += 1
+
+
+_request_counter: contextvars.ContextVar[RequestCounter | None] = contextvars.ContextVar(
+    "request_counter", default=None
+)
+
+
+@contextmanager
+def count_requests() -> Generator[RequestCounter]:
+    """
+    Count the requests sent by the shared httpx clients within the block, including from the
+    threads started with a copy of the current context.
+    """
+
+    counter = RequestCounter()
+    token = _request_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _request_counter.reset(token)
+
+
+def _count_request(request: Request) -> None:
+    if (counter := _request_counter.get()) is not None:
+        counter.increment()
+
+
+def _get_environment_proxy(base_url: str) -> str | None:
+    """Proxy of the HTTP(S)_PROXY/ALL_PROXY variables for the host, unless NO_PROXY matches."""
+
+    url = URL(base_url)
+    if not url.host or urllib.request.proxy_bypass(url.host):
+        return None
+    proxies = urllib.request.getproxies()
+    return proxies.get(url.scheme) or proxies.get("all")
+
+
+def get_http_client(key: Hashable, rate_limit: RateLimit | None = None, **kwargs) -> Client:
+    """
+    Return the process-wide httpx client registered under the given key (typically the
+    base URL and credentials of an upstream API), creating it with kwargs on first use,
+    so that connections (and tokens) are reused across API client instances.
+    With a rate limit, the requests are throttled per host across all the processes.
+    """
+
+    event_hooks = kwargs.pop("event_hooks", {})
+    event_hooks = event_hooks | {"request": [_count_request, *event_hooks.get("request", [])]}
+
+    transport_kwargs = {
+        "limits": Limits(
+            max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+        ),
+        # HTTP/2 requires the optional h2 package, httpx raises an ImportError without it
+        "http2": settings.HTTP_CLIENT_HTTP2,
+    }
+
+    with _http_clients_lock:
+        client = _http_clients.get(key)
+        if client is None or client.is_closed:
+            if rate_limit is not None and rate_limit.rate > 0:
+                # httpx ignores the proxies of the environment along with a custom transport
+                proxy = kwargs.pop("proxy", None)
+                if proxy is None and kwargs.get("trust_env", True):
+                    proxy = _get_environment_proxy(kwargs.get("base_url", ""))
+                kwargs["transport"] = RateLimitedTransport(
+                    HTTPTransport(proxy=proxy, **transport_kwargs), rate_limit
+                )
+            else:
+                kwargs |= transport_kwargs
+            client = _http_clients[key] = Client(event_hooks=event_hooks, **kwargs)
+        return client
+
+
+def close_http_clients() -> None:
+    with _http_clients_lock:
+        for client in _http_clients.values():
+            client.close()
+        _http_clients.clear()
 
 
 class TokenBearerAuth(Auth):
+    """
+    Bearer authentication with tokens obtained from the API `/token/` endpoint.
+
+    Tokens are kept in the shared token store, so that they are reused by all the clients
+    (and workers, depending on the store) using the same credentials. They are refreshed
+    before they expire, one refresh at a time per credentials.
+    """
+
     requires_response_body = True
     access_token: str = None
-    refresh_token: str = None
     base_url: str
     username: str
     password: str
 
-    def __init__(self, base_url: str, username: str, password: str, *args, **kwargs):
+    def __init__(
+        self,
+        base_url: str,
+        username: str,
+        password: str,
+        *args,
+        access_token: str | None = None,
+        **kwargs,
+    ):
         self.base_url = base_url
         self.username = username
         self.password = password
+        self.access_token = access_token
         super().__init__(*args, **kwargs)
 
+    @property
+    def token_key(self) -> str:
+        return get_token_key(self.base_url, self.username, self.password)
+
     def auth_flow(self, request: Request):
-        if self.access_token is None:
-            token_response = yield self._build_token_request()
-            self._update_tokens(token_response)
+        if self.access_token is not None:
             request.headers["Authorization"] = f"Bearer {self.access_token}"
             yield request
+            return
+
+        store = get_token_store()
 
-        request.headers["Authorization"] = f"Bearer {self.access_token}"
+        tokens = store.get(self.token_key)
+        if tokens is None or is_token_expiring(tokens.access):
+            with store.lock(self.token_key):
+                # tokens may have been refreshed while waiting for the lock
+                tokens = store.get(self.token_key)
+                if tokens is None or is_token_expiring(tokens.access):
+                    tokens = yield from self._fetch_tokens(tokens)
+
+        request.headers["Authorization"] = f"Bearer {tokens.access}"
         response = yield request
 
         if response.status_code == 401:
-            refresh_response = yield self._build_refresh_request()
-            self._update_tokens(refresh_response)
-            request.headers["Authorization"] = f"Bearer {self.access_token}"
+            with store.lock(self.token_key):
+                latest_tokens = store.get(self.token_key)
+                if latest_tokens is None or latest_tokens.access == tokens.access:
+                    latest_tokens = yield from self._fetch_tokens(tokens)
+
+            request.headers["Authorization"] = f"Bearer {latest_tokens.access}"
             yield request
 
+    def _fetch_tokens(self, tokens: Tokens | None):
+        if tokens is not None and tokens.refresh and not is_token_expiring(tokens.refresh):
+            response = yield self._build_refresh_request(tokens.refresh)
+        else:
+            response = yield self._build_token_request()
+
+        payload = response.json()
+        tokens = Tokens(
+            access=payload["access"],
+            refresh=payload.get("refresh") or (tokens.refresh if tokens else None),
+        )
+        get_token_store().set(self.token_key, tokens)
+        return tokens
+
     def _build_token_request(self):
         return Request(
             "POST",
@@ -46,31 +198,34 @@ class TokenBearerAuth(Auth):
             },
         )
 
-    def _build_refresh_request(self):
+    def _build_refresh_request(self, refresh_token: str):
         return Request(
             "POST",
             f"{self.base_url}/token/refresh/",
             data={
-                "refresh": self.refresh_token,
+                "refresh": refresh_token,
             },
         )
 
-    def _update_tokens(self, response: Response):
-        payload = response.json()
-        self.access_token = payload["access"]
-        if "refresh" in payload:
-            self.refresh_token = payload["refresh"]
-
 
 def raise_on_4xx_5xx(response: Response):
     response.raise_for_status()
 
 
+class BulkFilterNotSupportedError(Exception):
+    pass
+
+
 class RecocoApiClient:
     _client: Client
+    bulk_filters_supported: bool = True
 
     def __init__(self, api_url: str, *args, **kwargs):
-        self._client = Client(
+        self.api_url = api_url
+        # bound the requests in flight, whatever the number of threads using the client
+        self._concurrency = threading.BoundedSemaphore(settings.RECOCO_API_MAX_CONCURRENCY)
+        self._client = get_http_client(
+            (api_url, settings.RECOCO_API_USERNAME, *sorted(kwargs.items())),
             auth=TokenBearerAuth(
                 base_url=api_url,
                 username=settings.RECOCO_API_USERNAME,
@@ -78,39 +233,139 @@ class RecocoApiClient:
             ),
             base_url=api_url,
             event_hooks={"response": [raise_on_4xx_5xx]},
+            rate_limit=RateLimit(
+                settings.RECOCO_API_RATE_LIMIT, settings.RECOCO_API_RATE_LIMIT_BURST
+            ),
             **kwargs,
         )
 
-    def get_projects(self) -> dict[str, Any]:
-        response = self._client.get("/projects/")
+    def _request(self, method: str, url: str, **kwargs) -> Response:
+        with self._concurrency:
+            return self._client.request(method, url, **kwargs)
+
+    def _get_json(self, url: str, params: dict[str, Any] | None = None) -> Any:
+        response = self._request("GET", url, params=params)
         return response.json()
 
+    def iter_results(
+        self, url: str, params: dict[str, Any] | None = None, page_size: int | None = None
+    ) -> Generator[dict[str, Any]]:
+        """
+        Iterate over the items of a (possibly) paginated endpoint, following the `next` links.
+        The next page is prefetched while the items of the current one are being consumed.
+        """
+
+        params = {"limit": page_size or settings.RECOCO_API_PAGE_SIZE} | (params or {})
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(contextvars.copy_context().run, self._get_json, url, params)
+            while future is not None:
+                payload = future.result()
+
+                # endpoint without pagination
+                if isinstance(payload, list):
+                    yield from payload
+                    return
+
+                next_url = payload.get("next")
+                future = (
+                    executor.submit(contextvars.copy_context().run, self._get_json, next_url)
+                    if next_url
+                    else None
+                )
+                yield from payload.get("results", [])
+
+    def iter_projects(
+        self, page_size: int | None = None, modified_since: datetime | None = None
+    ) -> Generator[dict[str, Any]]:
+        params = {"updated_on__gte": modified_since.isoformat()} if modified_since else None
+        return self.iter_results("/projects/", params=params, page_size=page_size)
+
+    def iter_survey_sessions(
+        self, project_id: int, page_size: int | None = None
+    ) -> Generator[dict[str, Any]]:
+        return self.iter_results(
+            "/survey/sessions/", params={"project_id": project_id}, page_size=page_size
+        )
+
+    def iter_survey_session_answers(
+        self, session_id: int, page_size: int | None = None
+    ) -> Generator[dict[str, Any]]:
+        return self.iter_results(f"/survey/sessions/{session_id}/answers/", page_size=page_size)
+
+    def iter_questions(self, page_size: int | None = None) -> Generator[dict[str, Any]]:
+        return self.iter_results("/survey/questions/", page_size=page_size)
+
+    def get_projects_survey_answers(
+        self, project_ids: list[int]
+    ) -> dict[int, list[dict[str, Any]]] | None:
+        """
+        Fetch the answers of the first survey session of several projects in as few requests
+        as possible, using `__in` filters. Return None if the API does not support them,
+        in which case the caller should fall back to per-project requests.
+        """
+
+        if not self.bulk_filters_supported:
+            return None
+
+        try:
+            first_sessions: dict[int, int] = {}
+            for session in self.iter_results(
+                "/survey/sessions/",
+                params={"project_id__in": ",".join(str(pk) for pk in project_ids)},
+            ):
+                # an API ignoring the filter would return sessions of any project
+                if session.get("project") not in project_ids:
+                    raise BulkFilterNotSupportedError
+                first_sessions.setdefault(session["project"], session["id"])
+
+            answers: dict[int, list[dict[str, Any]]] = {pk: [] for pk in project_ids}
+            if not first_sessions:
+                return answers
+
+            session_projects = {v: k for k, v in first_sessions.items()}
+            for answer in self.iter_results(
+                "/survey/answers/",
+                params={"session_id__in": ",".join(str(pk) for pk in session_projects)},
+            ):
+                if (project_id := session_projects.get(answer.get("session"))) is None:
+                    raise BulkFilterNotSupportedError
+                answers[project_id].append(answer)
+
+            return answers
+
+        except HTTPStatusError as err:
+            if err.response.status_code not in (400, 404):
+                raise
+        except BulkFilterNotSupportedError:
+            pass
+
+        logger.info(f"Bulk filters not supported by {self._client.base_url}, fallback.")
+        self.bulk_filters_supported = False
+        return None
+
     def get_project(self, project_id: int) -> dict[str, Any]:
-        response = self._client.get(f"/projects/{project_id}/")
+        response = self._request("GET", f"/projects/{project_id}/")
         return response.json()
 
     def get_survey_sessions(self, project_id: int) -> dict[str, Any]:
-        response = self._client.get(f"/survey/sessions/?project_id={project_id}")
+        response = self._request("GET", f"/survey/sessions/?project_id={project_id}")
         return response.json()
 
     def get_survey_session_answers(self, session_id: int) -> dict[str, Any]:
-        response = self._client.get(f"/survey/sessions/{session_id}/answers/")
-        return response.json()
-
-    def get_questions(self) -> dict[str, Any]:
-        response = self._client.get("/survey/questions/?limit=500")
+        response = self._request("GET", f"/survey/sessions/{session_id}/answers/")
         return response.json()
 
     def get_resource_addons(self, recommendation_id: int) -> dict[str, Any]:
-        response = self._client.get(
-            f"/resource-addons/?recommendation={recommendation_id}&nature=lescommuns"
+        response = self._request(
+            "GET", f"/resource-addons/?recommendation={recommendation_id}&nature=lescommuns"
         )
         return response.json()
 
     def create_resource_addon(self, payload: dict[str, Any]) -> dict[str, Any]:
-        response = self._client.post("/resource-addons/", json=payload)
+        response = self._request("POST", "/resource-addons/", json=payload)
         return response.json()
 
     def update_resource_addon(self, addon_id: int, payload: dict[str, Any]) -> dict[str, Any]:
-        response = self._client.put(f"/resource-addons/{addon_id}/", json=payload)
+        response = self._request("PUT", f"/resource-addons/{addon_id}/", json=payload)
         return response.json()
@@ -3,59 +3,192 @@ from __future__ import annotations
 import inspect
 import logging
 from abc import ABCMeta, abstractmethod
-from collections.abc import Generator
+from collections.abc import Generator, Iterator
+from datetime import datetime
+from functools import partial
 from importlib import import_module
+from itertools import chain
 from typing import Any
+from uuid import UUID
 
 from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
 from django.utils.module_loading import module_has_submodule
 
 from recoco_sync.main.models import WebhookEvent
-from recoco_sync.main.utils import QuestionType, get_question_type
+from recoco_sync.main.utils import QuestionType, bounded_map, chunked
 
+from .catalogue import CatalogueQuestion, QuestionCatalogue, get_question_catalogue
 from .choices import ObjectType
 from .clients import RecocoApiClient
-from .schemas import Project
+from .schemas import dump_project
 
 logger = logging.getLogger(__name__)
 
 
 class Connector(metaclass=ABCMeta):
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
     def get_recoco_api_client(self, **kwargs) -> RecocoApiClient:
         return RecocoApiClient(timeout=60, **kwargs)
 
     def fetch_projects_data(
-        self, project_ids: list[int] | None = None, **kwargs
+        self,
+        project_ids: list[int] | None = None,
+        modified_since: datetime | None = None,
+        event: WebhookEvent | None = None,
+        **kwargs,
     ) -> Generator[tuple[int, dict]]:
-        """Fetch data related to projects through the Recoco API."""
+        """
+        Fetch data related to projects through the Recoco API.
+
+        Projects and their survey answers are fetched concurrently, with at most
+        settings.RECOCO_API_MAX_CONCURRENCY requests in flight through the Recoco client,
+        but are yielded in a stable order. With settings.RECOCO_API_BULK_HYDRATION, the answers are
+        fetched for a whole page of projects at once when the API allows it.
+
+        When modified_since is given, only the projects modified since then are fetched.
+
+        When an event is given, the raw payloads fetched for the given projects are cached
+        for the processing of this event, and shared by all the connectors and configs as
+        long as settings.WEBHOOK_HYDRATION_CACHE_ALIAS is shared by the workers.
+        """
 
         recoco_client = self.get_recoco_api_client(**kwargs)
 
-        if project_ids:
-            projects = [
-                recoco_client.get_project(project_id=project_id) for project_id in project_ids
-            ]
+        if event is not None and project_ids:
+            hydrated_projects = self._hydrate_event_projects(recoco_client, project_ids, event)
         else:
-            projects = recoco_client.get_projects()
+            hydrated_projects = self._hydrate_projects(
+                recoco_client, project_ids=project_ids, modified_since=modified_since
+            )
 
-        for project in projects:
+        question_catalogue = None
+        for project, answers in hydrated_projects:
             project_data = self.map_from_project_payload_object(payload=project, **kwargs)
-
-            sessions = recoco_client.get_survey_sessions(project_id=project["id"])
-            if sessions["count"] > 0:
-                answers = recoco_client.get_survey_session_answers(
-                    session_id=sessions["results"][0]["id"]
-                )
-                for answer in answers["results"]:
-                    project_data.update(
-                        self.map_from_survey_answer_payload_object(payload=answer, **kwargs)
+            for answer in answers:
+                if question_catalogue is None:
+                    question_catalogue = get_question_catalogue(recoco_client)
+                project_data.update(
+                    self.map_from_survey_answer_payload_object(
+                        payload=answer, question_catalogue=question_catalogue, **kwargs
                     )
+                )
 
             yield project["id"], project_data
 
+    def _hydrate_projects(
+        self,
+        recoco_client: RecocoApiClient,
+        project_ids: list[int] | None = None,
+        modified_since: datetime | None = None,
+    ) -> Iterator[tuple[dict[str, Any], list[dict[str, Any]]]]:
+        """Fetch the raw payloads of projects along with their survey answers."""
+
+        max_workers = settings.RECOCO_API_MAX_CONCURRENCY
+
+        if project_ids:
+            projects = bounded_map(
+                lambda project_id: recoco_client.get_project(project_id=project_id),
+                project_ids,
+                max_workers=max_workers,
+            )
+        else:
+            projects = recoco_client.iter_projects(modified_since=modified_since)
+
+        if modified_since:
+            # in case the API ignores the filter
+            projects = (p for p in projects if self._is_modified_since(p, modified_since))
+
+        if settings.RECOCO_API_BULK_HYDRATION:
+            return chain.from_iterable(
+                bounded_map(
+                    partial(self._fetch_projects_survey_answers, recoco_client),
+                    chunked(projects, settings.RECOCO_API_PAGE_SIZE),
+                    max_workers=max_workers,
+                )
+            )
+
+        return bounded_map(
+            partial(self._fetch_project_survey_answers, recoco_client),
+            projects,
+            max_workers=max_workers,
+        )
+
+    def _hydrate_event_projects(
+        self, recoco_client: RecocoApiClient, project_ids: list[int], event: WebhookEvent
+    ) -> list[tuple[dict[str, Any], list[dict[str, Any]]]]:
+        """Same as _hydrate_projects, through a cache scoped to the given event."""
+
+        cache = caches[settings.WEBHOOK_HYDRATION_CACHE_ALIAS]
+        cache_keys = {
+            project_id: get_hydration_cache_key(event.id, recoco_client.api_url, project_id)
+            for project_id in project_ids
+        }
+
+        hydrated_projects = cache.get_many(cache_keys.values())
+
+        if missing_project_ids := [
+            project_id
+            for project_id in project_ids
+            if cache_keys[project_id] not in hydrated_projects
+        ]:
+            fetched = {
+                cache_keys[project["id"]]: (project, answers)
+                for project, answers in self._hydrate_projects(
+                    recoco_client, project_ids=missing_project_ids
+                )
+            }
+            cache.set_many(fetched, timeout=settings.WEBHOOK_HYDRATION_CACHE_TIMEOUT)
+            hydrated_projects |= fetched
+
+        return [
+            hydrated_projects[cache_keys[project_id]]
+            for project_id in project_ids
+            if cache_keys[project_id] in hydrated_projects
+        ]
+
+    @staticmethod
+    def _is_modified_since(project: dict[str, Any], modified_since: datetime) -> bool:
+        modified = project.get("updated_on") or project.get("modified")
+        if modified is None:
+            return True
+        modified = datetime.fromisoformat(modified)
+        if timezone.is_naive(modified):
+            modified = timezone.make_aware(modified)
+        return modified >= modified_since
+
+    @staticmethod
+    def _fetch_project_survey_answers(
+        recoco_client: RecocoApiClient, project: dict[str, Any]
+    ) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+        sessions = recoco_client.get_survey_sessions(project_id=project["id"])
+        if sessions["count"] == 0:
+            return project, []
+
+        answers = recoco_client.iter_survey_session_answers(session_id=sessions["results"][0]["id"])
+        return project, list(answers)
+
+    @classmethod
+    def _fetch_projects_survey_answers(
+        cls, recoco_client: RecocoApiClient, projects: list[dict[str, Any]]
+    ) -> list[tuple[dict[str, Any], list[dict[str, Any]]]]:
+        answers = recoco_client.get_projects_survey_answers(
+            project_ids=[project["id"] for project in projects]
+        )
+        if answers is None:
+            return [
+                cls._fetch_project_survey_answers(recoco_client, project) for project in projects
+            ]
+
+        return [(project, answers[project["id"]]) for project in projects]
+
     def map_from_project_payload_object(self, payload: dict[str, Any], **kwargs) -> dict[str, Any]:
-        data = Project(**payload)
-        return data.model_dump(by_alias=True)
+        return dump_project(payload)
 
     def map_from_survey_answer_payload_object(
         self, payload: dict[str, Any], **kwargs
@@ -66,15 +199,21 @@ class Connector(metaclass=ABCMeta):
         if not question:
             return data
 
-        question_slug = question.get("slug")
-        if not question_slug:
+        if not question.get("slug"):
             return data
 
-        col_id = str(question_slug).replace("-", "_")
+        question_catalogue: QuestionCatalogue | None = kwargs.get("question_catalogue")
+        question = (
+            question_catalogue.get(question)
+            if question_catalogue is not None
+            else CatalogueQuestion.from_payload(question)
+        )
+
+        col_id = question.col_id
         choices = payload.get("choices", [])
         comment = payload.get("comment", "")
 
-        match get_question_type(question):
+        match question.question_type:
             case QuestionType.SIMPLE:
                 data[col_id] = comment
 
@@ -107,10 +246,18 @@ class Connector(metaclass=ABCMeta):
 connectors: list[Connector] = []
 
 
+def get_hydration_cache_key(event_id: UUID, api_url: str, project_id: int) -> str:
+    return f"recoco-sync:hydration:{event_id}:{api_url}:{project_id}"
+
+
 def get_connectors() -> list[Connector]:
     return connectors
 
 
+def get_connector(name: str) -> Connector | None:
+    return next((connector for connector in get_connectors() if connector.name == name), None)
+
+
 def auto_discover_connectors():
     """Collect all connectors from installed apps."""
 
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import NamedTuple
+from uuid import UUID
+
+from django.conf import settings
+
+from .models import WebhookConfig
+
+
+class WebhookConfigEntry(NamedTuple):
+    id: UUID
+    enabled: bool
+    api_url: str
+
+
+class WebhookConfigCache:
+    """
+    In-memory index of the webhook configs by code, so that resolving the code of a webhook
+    request, even an unknown one, does not hit the database.
+
+    The whole table is loaded at the first lookup, reloaded when a config is saved or deleted
+    in the current process, and every settings.WEBHOOK_CONFIG_CACHE_TIMEOUT seconds to catch
+    up with the changes made by other processes.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, WebhookConfigEntry] | None = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def _is_stale(self) -> bool:
+        return self._entries is None or self._expires_at <= time.monotonic()
+
+    def _set_entries(self, rows: list[tuple[str, UUID, bool, str]]) -> dict:
+        entries = {code: WebhookConfigEntry(*values) for code, *values in rows}
+        with self._lock:
+            self._entries = entries
+            self._expires_at = time.monotonic() + settings.WEBHOOK_CONFIG_CACHE_TIMEOUT
+        return entries
+
+    @staticmethod
+    def _get_queryset():
+        return WebhookConfig.objects.order_by().values_list("code", "id", "enabled", "api_url")
+
+    def get(self, code: str) -> WebhookConfigEntry | None:
+        entries = self._entries
+        if self._is_stale:
+            entries = self._set_entries(list(self._get_queryset()))
+        return entries.get(code)
+
+    async def aget(self, code: str) -> WebhookConfigEntry | None:
+        entries = self._entries
+        if self._is_stale:
+            entries = self._set_entries([row async for row in self._get_queryset()])
+        return entries.get(code)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries = None
+
+
+webhook_config_cache = WebhookConfigCache()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import random
+import time
+import warnings
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from recoco_sync.main.schemas import Project, dump_project
+
+
+def generate_project_payload(project_id: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "id": project_id,
+        "name": f"Projet {project_id}",
+        "description": "Description " * rng.randint(1, 20),
+        "status": rng.choice(["TO_PROCESS", "IN_PROGRESS", "DONE"]),
+        "inactive_since": rng.choice([None, "2024-01-01T00:00:00+01:00"]),
+        "created_on": "2023-10-10T09:50:32.182591+02:00",
+        "updated_on": "2024-05-24T10:54:21.653995+02:00",
+        "org_name": rng.choice([None, "Mairie", "Conseil départemental"]),
+        "location": rng.choice([None, "rue des hirondelles"]),
+        "latitude": rng.uniform(42, 51),
+        "longitude": rng.uniform(-5, 8),
+        "commune": {
+            "name": f"COMMUNE {project_id % 1000}",
+            "insee": f"{project_id % 100000:05d}",
+            "postal": f"{project_id % 100000:05d}",
+            "department": {
+                "name": "Loire-Atlantique",
+                "code": "44",
+                "region": {"name": "Pays de la Loire", "code": "52"},
+            },
+        },
+        "tags": rng.sample(["tag1", "tag2", "tag3", "tag4"], k=rng.randint(0, 4)),
+        "advisors_note": rng.choice([None, "Note conseiller"]),
+        "switchtenders": [],
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare the pydantic and fast-path mappings of Recoco projects."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=50_000)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        # the pydantic model serializes the joined tags with a warning
+        warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
+
+        rng = random.Random(options["seed"])
+        payloads = [generate_project_payload(i, rng) for i in range(options["count"])]
+
+        mismatches = sum(
+            dump_project(payload) != Project(**payload).model_dump(by_alias=True)
+            for payload in payloads
+        )
+        if mismatches:
+            self.stderr.write(self.style.ERROR(f"{mismatches} mappings differ"))
+
+        timings = {}
+        for label, func in (
+            ("pydantic", lambda payload: Project(**payload).model_dump(by_alias=True)),
+            ("fast path", dump_project),
+        ):
+            best = float("inf")
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                for payload in payloads:
+                    func(payload)
+                best = min(best, time.perf_counter() - start)
+            timings[label] = best
+            self.stdout.write(
+                f"{label}: {best:.3f}s, {best / len(payloads) * 1e6:.1f}µs per project"
+            )
+
+        self.stdout.write(f"speedup: x{timings['pydantic'] / timings['fast path']:.1f}")
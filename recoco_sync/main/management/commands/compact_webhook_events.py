@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recoco_sync.main.retention import compact_webhook_events
+
+
+class Command(BaseCommand):
+    help = "Compress the payloads and filter the headers of the processed webhook events."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=7)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--codec", choices=("zlib", "zstd"), default=None)
+
+    def handle(self, *args, **options):
+        codec = options["codec"] or settings.WEBHOOK_ARCHIVE_CODEC
+        count = compact_webhook_events(
+            older_than_days=options["older_than_days"],
+            batch_size=options["batch_size"],
+            codec=codec,
+        )
+        self.stdout.write(f"{count} webhook events compacted with {codec}.")
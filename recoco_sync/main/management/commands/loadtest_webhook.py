@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from collections import Counter
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+
+def build_signed_request(payload: dict, secret: str) -> tuple[bytes, dict[str, str]]:
+    body = json.dumps(payload).encode()
+    timestamp = str(int(time.time()))
+    signature = hmac.new(
+        key=secret.encode(),
+        msg=timestamp.encode() + b":" + body,
+        digestmod=hashlib.sha256,
+    ).hexdigest()
+    return body, {
+        "Content-Type": "application/json",
+        "Django-Webhook-UUID": str(uuid.uuid4()),
+        "Django-Webhook-Request-Timestamp": timestamp,
+        "Django-Webhook-Signature-v1": signature,
+    }
+
+
+async def run_load(url: str, total: int, concurrency: int, secret: str) -> tuple[float, Counter]:
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses: Counter = Counter()
+
+    async def send(client: httpx.AsyncClient, index: int):
+        payload = {
+            "topic": "projects.Project/update",
+            "object": {"id": index},
+            "object_type": "projects.Project",
+            "webhook_uuid": str(uuid.uuid4()),
+        }
+        body, headers = build_signed_request(payload, secret)
+        async with semaphore:
+            try:
+                response = await client.post(url, content=body, headers=headers)
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as exc:
+                statuses[type(exc).__name__] += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(send(client, i) for i in range(total)))
+        return time.perf_counter() - start, statuses
+
+
+class Command(BaseCommand):
+    help = (
+        "Send signed webhook events to a running server, "
+        "and compare the requests per second of the sync and async endpoints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("code", help="Code of an enabled WebhookConfig")
+        parser.add_argument("--base-url", default="http://localhost:8002")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument(
+            "--endpoint", choices=("sync", "async", "both"), default="both", dest="endpoint"
+        )
+
+    def handle(self, *args, **options):
+        url_names = {"sync": "api:webhook", "async": "api:webhook_async"}
+        endpoints = ("sync", "async") if options["endpoint"] == "both" else (options["endpoint"],)
+
+        for endpoint in endpoints:
+            url = options["base_url"].rstrip("/") + reverse(
+                url_names[endpoint], kwargs={"code": options["code"]}
+            )
+            duration, statuses = asyncio.run(
+                run_load(
+                    url,
+                    total=options["requests"],
+                    concurrency=options["concurrency"],
+                    secret=settings.WEBHOOK_SECRET,
+                )
+            )
+            self.stdout.write(
+                f"{endpoint}: {options['requests'] / duration:.0f} req/s "
+                f"({options['requests']} requests in {duration:.2f}s, statuses: {dict(statuses)})"
+            )
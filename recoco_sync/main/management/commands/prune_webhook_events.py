@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recoco_sync.main.retention import get_finished_webhook_events, prune_webhook_events
+
+
+class Command(BaseCommand):
+    help = "Delete the processed webhook events older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days", type=int, default=settings.WEBHOOK_EVENT_RETENTION_DAYS
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.WEBHOOK_EVENT_RETENTION_BATCH_SIZE
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            count = get_finished_webhook_events(options["older_than_days"]).count()
+            self.stdout.write(f"{count} webhook events would be deleted.")
+            return
+
+        count = prune_webhook_events(
+            older_than_days=options["older_than_days"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(f"{count} webhook events deleted.")
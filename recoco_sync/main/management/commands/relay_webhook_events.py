@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recoco_sync.main.outbox import relay_webhook_event_runs, relay_webhook_events
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish the pending webhook events to the Celery broker, in batches, along with "
+        "the connector runs whose task was lost."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.WEBHOOK_OUTBOX_BATCH_SIZE)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.WEBHOOK_OUTBOX_POLL_INTERVAL,
+            help="Seconds to wait when there is no event to publish",
+        )
+        parser.add_argument("--once", action="store_true", help="Publish a single batch and exit")
+
+    def handle(self, *args, **options):
+        try:
+            self.relay(options["batch_size"], options["interval"], once=options["once"])
+        except KeyboardInterrupt:
+            pass
+
+    def relay(self, batch_size: int, interval: float, *, once: bool) -> None:
+        while True:
+            try:
+                count = relay_webhook_events(batch_size=batch_size)
+                run_count = relay_webhook_event_runs(batch_size=batch_size)
+            except Exception:
+                # broker or database unavailable: the claim is rolled back, retry later
+                if once:
+                    raise
+                logger.exception("Failed to relay the webhook events")
+                time.sleep(interval)
+                continue
+            if count:
+                self.stdout.write(f"{count} webhook events published.")
+            if run_count:
+                self.stdout.write(f"{run_count} lost webhook event runs published again.")
+            if once:
+                return
+            if count < batch_size and run_count < batch_size:
+                time.sleep(interval)
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from recoco_sync.main.choices import ObjectType, WebhookEventStatus
+from recoco_sync.main.models import WebhookEvent
+from recoco_sync.main.replay import (
+    replay_webhook_events,
+    reset_events_for_replay,
+    select_events_to_replay,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the webhook events matching the given filters, keeping only the most recent "
+        "event of each project."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=WebhookEventStatus.values,
+            help="Default to pending, failed and replaying events",
+        )
+        parser.add_argument("--config", help="Code of the webhook config")
+        parser.add_argument("--object-type", action="append", choices=ObjectType.values)
+        parser.add_argument("--since", help="ISO date or datetime, included")
+        parser.add_argument("--until", help="ISO date or datetime, excluded")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--rate", type=float, default=None, help="Max events per second")
+        parser.add_argument(
+            "--enqueue",
+            action="store_true",
+            help="Hand the events over to the outbox relay instead of processing them here",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def get_queryset(self, options):
+        queryset = WebhookEvent.objects.filter(
+            status__in=options["status"]
+            or [
+                WebhookEventStatus.PENDING,
+                WebhookEventStatus.FAILED,
+                # left over by an interrupted replay
+                WebhookEventStatus.REPLAYING,
+            ]
+        )
+        if options["config"]:
+            queryset = queryset.filter(webhook_config__code=options["config"])
+        if options["object_type"]:
+            queryset = queryset.filter(object_type__in=options["object_type"])
+        if options["since"]:
+            queryset = queryset.filter(created__gte=self.parse_datetime(options["since"]))
+        if options["until"]:
+            queryset = queryset.filter(created__lt=self.parse_datetime(options["until"]))
+        return queryset
+
+    @staticmethod
+    def parse_datetime(value: str) -> datetime:
+        try:
+            parsed = parse_datetime(value) or datetime.combine(date.fromisoformat(value), time())
+        except ValueError as exc:
+            raise CommandError(f"Invalid datetime: {value}") from exc
+        return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+    def handle(self, *args, **options):
+        selection = select_events_to_replay(self.get_queryset(options))
+        self.stdout.write(
+            f"{len(selection.event_ids)} webhook events to replay, "
+            f"{len(selection.duplicate_event_ids)} duplicates to coalesce."
+        )
+        if options["dry_run"] or not selection.event_ids:
+            return
+
+        reset_events_for_replay(selection, dispatched=not options["enqueue"])
+        if options["enqueue"]:
+            self.stdout.write("Webhook events handed over to the outbox relay.")
+            return
+
+        replayed = 0
+
+        def on_batch_done(count: int) -> None:
+            nonlocal replayed
+            replayed += count
+            self.stdout.write(f"{replayed}/{len(selection.event_ids)} webhook events replayed.")
+
+        replay_webhook_events(
+            selection.event_ids,
+            batch_size=options["batch_size"],
+            concurrency=options["concurrency"],
+            rate=options["rate"],
+            on_batch_done=on_batch_done,
+        )
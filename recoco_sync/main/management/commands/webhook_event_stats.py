@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import math
+from datetime import timedelta
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db.models import DurationField, ExpressionWrapper, F
+from django.utils import timezone
+
+from recoco_sync.main.choices import WebhookEventStatus
+from recoco_sync.main.models import WebhookEvent, WebhookEventRun
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def format_percentiles(durations: list[timedelta]) -> str:
+    if not durations:
+        return "-"
+    values = sorted(duration.total_seconds() * 1000 for duration in durations)
+    return " ".join(f"p{pct}={percentile(values, pct):.0f}ms" for pct in PERCENTILES)
+
+
+class Command(BaseCommand):
+    help = "Print the processing latency percentiles of the recent webhook events."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=24)
+        parser.add_argument("--config", help="Code of the webhook config")
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(hours=options["hours"])
+        events = WebhookEvent.objects.filter(created__gte=since)
+        if options["config"]:
+            events = events.filter(webhook_config__code=options["config"])
+
+        latencies = list(
+            events.filter(completed_at__isnull=False)
+            .annotate(
+                latency=ExpressionWrapper(
+                    F("completed_at") - F("created"), output_field=DurationField()
+                )
+            )
+            .values_list("latency", flat=True)
+        )
+        status_counts = {
+            status: events.filter(status=status).count() for status in WebhookEventStatus
+        }
+        self.stdout.write(
+            f"Events: {' '.join(f'{status}={count}' for status, count in status_counts.items())}"
+        )
+        self.stdout.write(f"Events latency: {format_percentiles(latencies)}")
+
+        runs = (
+            WebhookEventRun.objects.filter(event__in=events, duration__isnull=False)
+            .order_by("connector")
+            .values_list("connector", "status", "duration", "request_count")
+        )
+        for connector, grouped_runs in groupby(runs, key=lambda run: run[0]):
+            _, statuses, durations, request_counts = zip(*grouped_runs, strict=True)
+            failed = statuses.count(WebhookEventStatus.FAILED)
+            self.stdout.write(
+                f"{connector}: runs={len(durations)} failed={failed} "
+                f"requests/run={sum(request_counts) / len(durations):.1f} "
+                f"{format_percentiles(list(durations))}"
+            )
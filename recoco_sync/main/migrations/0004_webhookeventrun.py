@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:02
+
+from __future__ import annotations
+
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("main", "0003_alter_webhookevent_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WebhookEventRun",
+            fields=[
+                (
+                    "created",
+                    model_utils.fields.AutoCreatedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="created"
+                    ),
+                ),
+                (
+                    "modified",
+                    model_utils.fields.AutoLastModifiedField(
+                        default=django.utils.timezone.now, editable=False, verbose_name="modified"
+                    ),
+                ),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                ("connector", models.CharField(max_length=64)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("PROCESSED", "Processed"),
+                            ("INVALID", "Invalid"),
+                            ("FAILED", "Failed"),
+                            ("COALESCED", "Coalesced"),
+                        ],
+                        default="PENDING",
+                        max_length=32,
+                    ),
+                ),
+                ("exception", models.TextField(blank=True)),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="runs",
+                        to="main.webhookevent",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Webhook Event Run",
+                "verbose_name_plural": "Webhook Event Runs",
+                "db_table": "webhookeventrun",
+                "ordering": ("created",),
+                "unique_together": {("event", "connector")},
+            },
+        ),
+    ]
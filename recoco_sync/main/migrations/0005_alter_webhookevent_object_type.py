@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:04
+
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("main", "0004_webhookeventrun"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="webhookevent",
+            name="object_type",
+            field=models.CharField(
+                choices=[
+                    ("projects.Project", "Project"),
+                    ("survey.Answer", "Answer"),
+                    ("taggit.TaggedItem", "TaggedItem"),
+                    ("survey.Question", "Question"),
+                    ("tasks.Task", "Task"),
+                ],
+                help_text="Type of the object that triggered the webhook event",
+                max_length=32,
+            ),
+        ),
+    ]
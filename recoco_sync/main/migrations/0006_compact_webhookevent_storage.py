@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:11
+
+from __future__ import annotations
+
+import functools
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("main", "0005_alter_webhookevent_object_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webhookevent",
+            name="payload_archive",
+            field=models.BinaryField(
+                blank=True,
+                help_text="Compressed payload, once the event has been archived",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="webhookevent",
+            name="payload",
+            field=models.JSONField(
+                default=dict,
+                encoder=functools.partial(
+                    django.core.serializers.json.DjangoJSONEncoder,
+                    *(),
+                    **{"separators": (",", ":")},
+                ),
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:16
+
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("main", "0006_compact_webhookevent_storage"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="webhookevent",
+            index=models.Index(fields=["-created"], name="webhookevent_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="webhookevent",
+            index=models.Index(fields=["status", "-created"], name="webhookevent_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="webhookevent",
+            index=models.Index(fields=["topic", "-created"], name="webhookevent_topic_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="webhookevent",
+            index=models.Index(
+                fields=["object_type", "-created"], name="webhookevent_object_type_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="webhookevent",
+            index=models.Index(
+                condition=models.Q(("status", "PENDING")),
+                fields=["webhook_config", "object_type", "object_id"],
+                name="webhookevent_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:17
+
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("main", "0007_webhookevent_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webhookevent",
+            name="dispatched_at",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="When the event was published to the task queue by the outbox relay",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="webhookevent",
+            index=models.Index(
+                condition=models.Q(("status", "PENDING")),
+                fields=["dispatched_at", "created"],
+                name="webhookevent_outbox_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:20
+
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("main", "0008_webhookevent_dispatched_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webhookevent",
+            name="completed_at",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="When all the connectors finished processing the event",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="webhookeventrun",
+            name="duration",
+            field=models.DurationField(
+                blank=True, help_text="Processing time of the event by the connector", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="webhookeventrun",
+            name="request_count",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Number of requests sent to the upstream APIs"
+            ),
+        ),
+        migrations.AddField(
+            model_name="webhookeventrun",
+            name="started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="webhookeventrun",
+            name="traceback",
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:41
+
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("main", "0009_webhookevent_timings"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="webhookevent",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("PROCESSED", "Processed"),
+                    ("INVALID", "Invalid"),
+                    ("FAILED", "Failed"),
+                    ("COALESCED", "Coalesced"),
+                    ("REPLAYING", "Replaying"),
+                ],
+                default="PENDING",
+                help_text="Whether or not the webhook event has been successfully processed",
+                max_length=32,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="webhookeventrun",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("PROCESSED", "Processed"),
+                    ("INVALID", "Invalid"),
+                    ("FAILED", "Failed"),
+                    ("COALESCED", "Coalesced"),
+                    ("REPLAYING", "Replaying"),
+                ],
+                default="PENDING",
+                max_length=32,
+            ),
+        ),
+    ]
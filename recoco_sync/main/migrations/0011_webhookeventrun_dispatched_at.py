@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:52
+
+from __future__ import annotations
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("main", "0010_webhookevent_replaying_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webhookeventrun",
+            name="dispatched_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                help_text="When the run was last published to the task queue",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="webhookeventrun",
+            index=models.Index(
+                condition=models.Q(("status", "PENDING")),
+                fields=["dispatched_at"],
+                name="webhookeventrun_outbox_idx",
+            ),
+        ),
+    ]
@@ -1,20 +1,68 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
 from typing import Any, Self
 from uuid import uuid4
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
-from django.core.handlers.wsgi import WSGIRequest
 from django.core.mail import send_mail
 from django.db import models
+from django.http import HttpRequest
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from recoco_sync.utils.json import PrettyJSONEncoder
+from recoco_sync.utils.compression import compress_json, decompress_json
+from recoco_sync.utils.json import CompactJSONEncoder
 from recoco_sync.utils.models import BaseModel
 
 from .choices import ObjectType, WebhookEventStatus
 from .managers import UserManager
+from .ratelimit import RateLimit
+
+
+def filter_stored_headers(headers: Mapping[str, str]) -> dict[str, str]:
+    """Keep the request headers listed in settings.WEBHOOK_STORED_HEADERS, or all with '*'."""
+
+    allowed = {header.lower() for header in settings.WEBHOOK_STORED_HEADERS}
+    if "*" in allowed:
+        return dict(headers)
+    return {key: value for key, value in headers.items() if key.lower() in allowed}
+
+
+class RateLimitedConfig(models.Model):
+    """Rate limit of the requests sent to the upstream API of a connector config."""
+
+    # name of the settings holding the default rate limit and burst
+    default_rate_limit_setting: str
+
+    rate_limit = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name="Requêtes par seconde",
+        help_text="Débit maximal vers l'API, partagé par tous les workers. "
+        "Valeur par défaut des paramètres si vide, 0 pour ne pas limiter.",
+    )
+    rate_limit_burst = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Rafale de requêtes",
+        help_text="Nombre de requêtes pouvant être envoyées d'un coup au-delà du débit.",
+    )
+
+    class Meta:
+        abstract = True
+
+    def get_rate_limit(self) -> RateLimit:
+        return RateLimit(
+            rate=(
+                self.rate_limit
+                if self.rate_limit is not None
+                else getattr(settings, self.default_rate_limit_setting)
+            ),
+            burst=self.rate_limit_burst
+            or getattr(settings, f"{self.default_rate_limit_setting}_BURST"),
+        )
 
 
 def generate_random_code() -> str:
@@ -69,7 +117,13 @@ class WebhookEvent(BaseModel):
 
     remote_ip = models.GenericIPAddressField(help_text="IP address of the request client.")
     headers = models.JSONField(default=dict)
-    payload = models.JSONField(default=dict, encoder=PrettyJSONEncoder)
+    payload = models.JSONField(default=dict, encoder=CompactJSONEncoder)
+    payload_archive = models.BinaryField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Compressed payload, once the event has been archived",
+    )
 
     status = models.CharField(
         max_length=32,
@@ -84,24 +138,140 @@ class WebhookEvent(BaseModel):
         help_text="Traceback if an exception was thrown during processing",
     )
 
+    dispatched_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="When the event was published to the task queue by the outbox relay",
+    )
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="When all the connectors finished processing the event",
+    )
+
     class Meta:
         verbose_name = "Webhook Event"
         verbose_name_plural = "Webhook Events"
         db_table = "webhookevent"
         ordering = ("-created",)
+        indexes = [
+            models.Index(fields=["-created"], name="webhookevent_created_idx"),
+            models.Index(fields=["status", "-created"], name="webhookevent_status_idx"),
+            models.Index(fields=["topic", "-created"], name="webhookevent_topic_idx"),
+            models.Index(fields=["object_type", "-created"], name="webhookevent_object_type_idx"),
+            # lookup of the related pending events when coalescing
+            models.Index(
+                fields=["webhook_config", "object_type", "object_id"],
+                condition=models.Q(status=WebhookEventStatus.PENDING),
+                name="webhookevent_pending_idx",
+            ),
+            # claim of the events to dispatch by the outbox relay
+            models.Index(
+                fields=["dispatched_at", "created"],
+                condition=models.Q(status=WebhookEventStatus.PENDING),
+                name="webhookevent_outbox_idx",
+            ),
+        ]
 
     @property
     def object_data(self) -> dict[str, Any]:
-        return self.payload.get("object", {})
+        return self.get_payload().get("object", {})
+
+    @property
+    def is_archived(self) -> bool:
+        return self.payload_archive is not None
+
+    def get_payload(self) -> dict[str, Any]:
+        if self.payload_archive is not None:
+            return decompress_json(self.payload_archive)
+        return self.payload
+
+    def archive(self, codec: str | None = None) -> None:
+        """Compress the payload and drop the headers which are not worth keeping."""
+
+        if self.payload_archive is None:
+            self.payload_archive = compress_json(
+                self.payload, codec=codec or settings.WEBHOOK_ARCHIVE_CODEC
+            )
+            self.payload = {}
+        self.headers = filter_stored_headers(self.headers)
 
     @classmethod
-    def create_from_request(cls, request: WSGIRequest, **kwargs: dict[str, Any]) -> Self:
-        return cls.objects.create(
-            remote_ip=request.META.get("REMOTE_ADDR", "0.0.0.0"),
-            headers=dict(request.headers),
-            **kwargs,
+    def create_from_request(cls, request: HttpRequest, **kwargs: dict[str, Any]) -> Self:
+        return cls.objects.create(**cls._get_request_fields(request), **kwargs)
+
+    @classmethod
+    async def acreate_from_request(cls, request: HttpRequest, **kwargs: dict[str, Any]) -> Self:
+        return await cls.objects.acreate(**cls._get_request_fields(request), **kwargs)
+
+    @classmethod
+    def bulk_create_from_request(
+        cls, request: HttpRequest, events_data: list[dict[str, Any]]
+    ) -> list[Self]:
+        request_fields = cls._get_request_fields(request)
+        return cls.objects.bulk_create(
+            [cls(**request_fields, **event_data) for event_data in events_data]
         )
 
+    @staticmethod
+    def _get_request_fields(request: HttpRequest) -> dict[str, Any]:
+        return {
+            "remote_ip": request.META.get("REMOTE_ADDR", "0.0.0.0"),
+            "headers": filter_stored_headers(request.headers),
+        }
+
+
+class WebhookEventRun(BaseModel):
+    """Outcome of a webhook event processing by a given connector."""
+
+    event = models.ForeignKey(WebhookEvent, on_delete=models.CASCADE, related_name="runs")
+
+    connector = models.CharField(max_length=64)
+
+    status = models.CharField(
+        max_length=32,
+        choices=WebhookEventStatus.choices,
+        default=WebhookEventStatus.PENDING,
+    )
+
+    exception = models.TextField(blank=True)
+    traceback = models.TextField(blank=True)
+
+    dispatched_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        help_text="When the run was last published to the task queue",
+    )
+    started_at = models.DateTimeField(null=True, blank=True)
+    duration = models.DurationField(
+        null=True, blank=True, help_text="Processing time of the event by the connector"
+    )
+    request_count = models.PositiveIntegerField(
+        default=0, help_text="Number of requests sent to the upstream APIs"
+    )
+
+    class Meta:
+        verbose_name = "Webhook Event Run"
+        verbose_name_plural = "Webhook Event Runs"
+        db_table = "webhookeventrun"
+        ordering = ("created",)
+        unique_together = [
+            ("event", "connector"),
+        ]
+        indexes = [
+            # redelivery of the lost runs by the outbox relay
+            models.Index(
+                fields=["dispatched_at"],
+                condition=models.Q(status=WebhookEventStatus.PENDING),
+                name="webhookeventrun_outbox_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.connector} - {self.status}"
+
 
 class User(BaseModel, AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
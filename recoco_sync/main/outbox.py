@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from .choices import WebhookEventStatus
+from .models import WebhookEvent, WebhookEventRun
+from .tasks import process_webhook_event_runs, process_webhook_events
+
+
+def get_dispatchable_webhook_events() -> models.QuerySet[WebhookEvent]:
+    """
+    Pending events waiting to be published: the ones never dispatched, once the coalescing
+    window is over, and the ones whose task was lost before it created any connector run.
+    """
+
+    now = timezone.now()
+    never_dispatched = models.Q(
+        dispatched_at__isnull=True,
+        created__lte=now - timedelta(seconds=settings.WEBHOOK_COALESCING_WINDOW),
+    )
+    lost = models.Q(
+        dispatched_at__lte=now - timedelta(seconds=settings.WEBHOOK_OUTBOX_REDELIVERY_TIMEOUT)
+    ) & ~models.Exists(WebhookEventRun.objects.filter(event_id=models.OuterRef("pk")))
+
+    return WebhookEvent.objects.filter(never_dispatched | lost, status=WebhookEventStatus.PENDING)
+
+
+def relay_webhook_events(batch_size: int | None = None) -> int:
+    """
+    Claim a batch of dispatchable events and publish them to the broker as a single task.
+    Rows locked by another relay are skipped, so several relays can run side by side.
+    Return the number of published events.
+    """
+
+    batch_size = batch_size or settings.WEBHOOK_OUTBOX_BATCH_SIZE
+
+    with transaction.atomic():
+        event_ids = list(
+            get_dispatchable_webhook_events()
+            .select_for_update(skip_locked=True)
+            .order_by("created")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not event_ids:
+            return 0
+
+        WebhookEvent.objects.filter(id__in=event_ids).update(dispatched_at=timezone.now())
+        # published before commit: if the broker is unreachable, the claim is rolled back
+        process_webhook_events.delay(event_ids)
+
+    return len(event_ids)
+
+
+def get_redeliverable_webhook_event_runs() -> models.QuerySet[WebhookEventRun]:
+    """
+    Pending connector runs whose task was lost: not started within the redelivery timeout
+    after being published, or started before the task time limit and never finished.
+    """
+
+    now = timezone.now()
+    not_started = models.Q(
+        started_at__isnull=True,
+        dispatched_at__lte=now - timedelta(seconds=settings.WEBHOOK_OUTBOX_REDELIVERY_TIMEOUT),
+    )
+    not_finished = models.Q(
+        started_at__lte=now - timedelta(seconds=settings.CELERY_TASK_TIME_LIMIT),
+        dispatched_at__lte=now - timedelta(seconds=settings.CELERY_TASK_TIME_LIMIT),
+    )
+
+    return WebhookEventRun.objects.filter(
+        not_started | not_finished,
+        status=WebhookEventStatus.PENDING,
+        event__status=WebhookEventStatus.PENDING,
+    )
+
+
+def relay_webhook_event_runs(batch_size: int | None = None) -> int:
+    """
+    Claim a batch of lost connector runs and publish them again as a single task.
+    Return the number of published runs.
+    """
+
+    batch_size = batch_size or settings.WEBHOOK_OUTBOX_BATCH_SIZE
+
+    with transaction.atomic():
+        run_ids = list(
+            get_redeliverable_webhook_event_runs()
+            .select_for_update(skip_locked=True, of=("self",))
+            .order_by("dispatched_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not run_ids:
+            return 0
+
+        WebhookEventRun.objects.filter(id__in=run_ids).update(dispatched_at=timezone.now())
+        # published before commit: if the broker is unreachable, the claim is rolled back
+        process_webhook_event_runs.delay(run_ids)
+
+    return len(run_ids)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import caches
+from httpx import BaseTransport, Request, Response
+
+logger = logging.getLogger(__name__)
+
+# statuses of the responses asking to slow down, along with a Retry-After header
+RETRY_STATUSES = (429, 503)
+
+
+class RateLimit(NamedTuple):
+    rate: float
+    burst: int = 1
+
+
+class CacheTokenBucket:
+    """
+    Token bucket shared across processes through the Django cache, implemented as a generic
+    cell rate algorithm: the cache holds the theoretical arrival time of the next request,
+    which each request pushes forward atomically with `incr`. Requests are never rejected,
+    they wait for their slot, so that the throughput stays as close as possible to the rate.
+    """
+
+    key_prefix = "recoco-sync:ratelimit"
+    # a stale arrival time is ignored, the key only needs to outlive the pauses
+    timeout = 3600
+
+    def __init__(self, key: str, limit: RateLimit):
+        self.key = f"{self.key_prefix}:{key}"
+        self.interval = round(1_000_000 / limit.rate)
+        self.tolerance = self.interval * max(limit.burst - 1, 0)
+
+    @property
+    def cache(self):
+        return caches[settings.RATE_LIMIT_CACHE_ALIAS]
+
+    @staticmethod
+    def now() -> int:
+        return time.time_ns() // 1000
+
+    def reserve(self) -> float:
+        """Reserve the next slot, and return the number of seconds to wait for it."""
+
+        now = self.now()
+        try:
+            arrival = self.cache.incr(self.key, self.interval) - self.interval
+        except ValueError:
+            arrival = None
+        if arrival is None or arrival < now:
+            # the bucket is full again: restart from now
+            self.cache.set(self.key, now + self.interval, timeout=self.timeout)
+            arrival = now
+        return max(arrival - self.tolerance - now, 0) / 1_000_000
+
+    def acquire(self) -> None:
+        if (delay := self.reserve()) > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Delay all the next requests by the given number of seconds, e.g. after a 429."""
+
+        resume_at = self.now() + round(seconds * 1_000_000) + self.tolerance
+        current = self.cache.get(self.key) or 0
+        if resume_at > current:
+            self.cache.set(self.key, resume_at, timeout=self.timeout + seconds)
+
+
+def get_retry_after(response: Response, attempt: int) -> float:
+    """Seconds to wait before retrying, from the Retry-After header or an exponential backoff."""
+
+    value = response.headers.get("Retry-After", "")
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return min(2**attempt, settings.RATE_LIMIT_MAX_RETRY_AFTER)
+
+
+class RateLimitedTransport(BaseTransport):
+    """
+    Wrap an httpx transport to send at most `limit.rate` requests per second per host,
+    across all the processes, and retry the requests rejected with 429 once the delay
+    requested by the upstream API is over.
+    """
+
+    def __init__(self, transport: BaseTransport, limit: RateLimit):
+        self.transport = transport
+        self.limit = limit
+
+    def get_bucket(self, request: Request) -> CacheTokenBucket:
+        return CacheTokenBucket(request.url.netloc.decode(), self.limit)
+
+    @staticmethod
+    def should_retry(response: Response, attempt: int) -> bool:
+        if attempt >= settings.RATE_LIMIT_MAX_RETRIES:
+            return False
+        if response.status_code == 503:
+            return "Retry-After" in response.headers
+        return response.status_code in RETRY_STATUSES
+
+    def handle_request(self, request: Request) -> Response:
+        bucket = self.get_bucket(request)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            response = self.transport.handle_request(request)
+            if not self.should_retry(response, attempt):
+                return response
+
+            retry_after = min(
+                get_retry_after(response, attempt), settings.RATE_LIMIT_MAX_RETRY_AFTER
+            )
+            logger.warning(
+                f"{request.url.host} answered {response.status_code}, "
+                f"retrying in {retry_after:.1f}s"
+            )
+            response.close()
+            bucket.pause(retry_after)
+            attempt += 1
+
+    def close(self) -> None:
+        self.transport.close()
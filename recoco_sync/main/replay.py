@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from typing import NamedTuple
+from uuid import UUID
+
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+from .choices import WebhookEventStatus
+from .models import WebhookEvent, WebhookEventRun
+from .tasks import process_webhook_event_run, resolve_event_object, start_webhook_event_runs
+from .utils import bounded_map, chunked
+
+
+class ReplaySelection(NamedTuple):
+    event_ids: list[UUID]
+    duplicate_event_ids: list[UUID]
+
+
+class Throttle:
+    """Space out the calls of all threads to at most `rate` per second."""
+
+    def __init__(self, rate: float | None = None):
+        self.interval = 1 / rate if rate else 0
+        self._next_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def select_events_to_replay(queryset: models.QuerySet[WebhookEvent]) -> ReplaySelection:
+    """
+    Keep the most recent event of each object, i.e. of each project for the survey answers
+    and tags, since replaying it fetches the current state of the object anyway.
+    """
+
+    seen: set[tuple] = set()
+    selection = ReplaySelection(event_ids=[], duplicate_event_ids=[])
+
+    events = queryset.only(
+        "id", "webhook_config_id", "object_id", "object_type", "payload", "payload_archive"
+    ).order_by("-created")
+    for event in events.iterator(chunk_size=2000):
+        try:
+            key = (event.webhook_config_id, *resolve_event_object(event))
+        except (TypeError, ValueError):
+            key = (event.id,)
+
+        if key in seen:
+            selection.duplicate_event_ids.append(event.id)
+        else:
+            seen.add(key)
+            selection.event_ids.append(event.id)
+
+    selection.event_ids.reverse()
+    return selection
+
+
+def reset_events_for_replay(selection: ReplaySelection, *, dispatched: bool) -> None:
+    """
+    Set the selected events back to pending, without their previous connector runs.
+    Events not `dispatched` are then published by the outbox relay. The `dispatched` ones
+    are marked as replaying instead, which keeps the relay away from them until
+    `replay_webhook_events` reaches them.
+    """
+
+    with transaction.atomic():
+        for event_ids in chunked(selection.event_ids, 1000):
+            WebhookEventRun.objects.filter(event_id__in=event_ids).delete()
+            WebhookEvent.objects.filter(id__in=event_ids).update(
+                status=WebhookEventStatus.REPLAYING if dispatched else WebhookEventStatus.PENDING,
+                exception="",
+                traceback="",
+                dispatched_at=None,
+                completed_at=None,
+                modified=timezone.now(),
+            )
+        for event_ids in chunked(selection.duplicate_event_ids, 1000):
+            WebhookEvent.objects.filter(id__in=event_ids).update(
+                status=WebhookEventStatus.COALESCED, modified=timezone.now()
+            )
+
+
+def replay_webhook_events(
+    event_ids: list[UUID],
+    batch_size: int = 100,
+    concurrency: int = 1,
+    rate: float | None = None,
+    on_batch_done: Callable[[int], None] | None = None,
+) -> None:
+    """
+    Process replaying events within the current process: `concurrency` batches at a time,
+    starting at most `rate` events per second across all the batches.
+    """
+
+    throttle = Throttle(rate)
+
+    def replay_batch(batch: list[UUID]) -> int:
+        for event_id in batch:
+            throttle.wait()
+            # pending again only once its runs are about to be created, so that the outbox
+            # relay never sees it as lost, however long the replay lasts
+            WebhookEvent.objects.filter(id=event_id, status=WebhookEventStatus.REPLAYING).update(
+                status=WebhookEventStatus.PENDING, dispatched_at=timezone.now()
+            )
+            for run_id in start_webhook_event_runs(event_id):
+                process_webhook_event_run(run_id)
+        return len(batch)
+
+    def replay_batch_in_thread(batch: list[UUID]) -> int:
+        try:
+            return replay_batch(batch)
+        finally:
+            connections.close_all()
+
+    for count in bounded_map(
+        replay_batch if concurrency <= 1 else replay_batch_in_thread,
+        chunked(event_ids, batch_size),
+        max_workers=concurrency,
+    ):
+        if on_batch_done is not None:
+            on_batch_done(count)
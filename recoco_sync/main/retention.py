@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from .choices import WebhookEventStatus
+from .models import WebhookEvent
+
+
+def get_finished_webhook_events(older_than_days: int) -> models.QuerySet[WebhookEvent]:
+    """Webhook events which are no longer pending, created more than `older_than_days` ago."""
+
+    return WebhookEvent.objects.exclude(
+        status__in=[WebhookEventStatus.PENDING, WebhookEventStatus.REPLAYING]
+    ).filter(created__lt=timezone.now() - timedelta(days=older_than_days))
+
+
+def compact_webhook_events(
+    older_than_days: int, batch_size: int = 500, codec: str | None = None
+) -> int:
+    """Compress the payloads of the finished webhook events, in batches. Return their count."""
+
+    codec = codec or settings.WEBHOOK_ARCHIVE_CODEC
+    queryset = (
+        get_finished_webhook_events(older_than_days)
+        .filter(payload_archive__isnull=True)
+        .only("id", "payload", "headers", "payload_archive")
+        .order_by("created")
+    )
+
+    count = 0
+    while events := list(queryset[:batch_size]):
+        for event in events:
+            event.archive(codec=codec)
+        WebhookEvent.objects.bulk_update(
+            events, ["payload", "payload_archive", "headers"], batch_size=batch_size
+        )
+        count += len(events)
+    return count
+
+
+def prune_webhook_events(older_than_days: int, batch_size: int = 1000) -> int:
+    """
+    Delete the finished webhook events and their runs, in batches so that each
+    transaction stays short. Return the number of deleted events.
+    """
+
+    queryset = get_finished_webhook_events(older_than_days).order_by("created")
+
+    count = 0
+    while event_ids := list(queryset.values_list("id", flat=True)[:batch_size]):
+        WebhookEvent.objects.filter(id__in=event_ids).delete()
+        count += len(event_ids)
+    return count
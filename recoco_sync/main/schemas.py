@@ -71,3 +71,124 @@ class Project(BaseModel):
     @property
     def active(self) -> bool:
         return self.inactive_since is None
+
+
+class _FastPathUnsupportedError(Exception):
+    pass
+
+
+_MISSING = object()
+
+
+# keys which take precedence over, or stand in for, the usual Recoco API keys
+_PROJECT_ALTERNATE_KEYS = frozenset(
+    {
+        "created",
+        "modified",
+        "organization",
+        "commune_name",
+        "commune_insee",
+        "commune_postal",
+        "commune_department",
+        "commune_department_code",
+        "commune_region",
+        "commune_region_code",
+    }
+)
+
+_PROJECT_STR_KEYS = ("name", "created", "modified", "status")
+
+_PROJECT_OPTIONAL_STR_KEYS = (
+    "description",
+    "location",
+    "organization",
+    "inactive_since",
+    "city",
+    "insee",
+    "postal_code",
+    "department",
+    "department_code",
+    "region",
+    "region_code",
+    "advisors_note",
+)
+
+
+def _dump_project(payload: dict[str, Any]) -> dict[str, Any]:
+    if not _PROJECT_ALTERNATE_KEYS.isdisjoint(payload):
+        raise _FastPathUnsupportedError
+
+    try:
+        commune = payload["commune"]
+        department = commune["department"]
+        region = department.get("region")
+        if type(region) is not dict:
+            region = {}
+
+        data = {
+            "name": payload["name"],
+            "description": payload["description"],
+            "created": payload["created_on"],
+            "modified": payload["updated_on"],
+            "location": payload["location"],
+            "latitude": payload["latitude"],
+            "longitude": payload["longitude"],
+            "organization": payload["org_name"],
+            "inactive_since": payload["inactive_since"],
+            "status": payload["status"],
+            "city": commune["name"],
+            "insee": commune["insee"],
+            "postal_code": commune["postal"],
+            "department": department["name"],
+            "department_code": department["code"],
+            "region": region.get("name"),
+            "region_code": region.get("code"),
+            "tags": payload.get("tags", _MISSING),
+            "advisors_note": payload["advisors_note"],
+            "active": payload["inactive_since"] is None,
+        }
+    except (KeyError, TypeError, AttributeError) as e:
+        raise _FastPathUnsupportedError from e
+
+    if type(commune) is not dict or type(department) is not dict:
+        raise _FastPathUnsupportedError
+
+    _check_project_types(data)
+    data["tags"] = _dump_project_tags(data["tags"])
+    return data
+
+
+def _check_project_types(data: dict[str, Any]) -> None:
+    for key in _PROJECT_STR_KEYS:
+        if type(data[key]) is not str:
+            raise _FastPathUnsupportedError
+    for key in _PROJECT_OPTIONAL_STR_KEYS:
+        if data[key] is not None and type(data[key]) is not str:
+            raise _FastPathUnsupportedError
+    for key in ("latitude", "longitude"):
+        if (value := data[key]) is not None and type(value) is not float:
+            if type(value) is not int:
+                raise _FastPathUnsupportedError
+            data[key] = float(value)
+
+
+def _dump_project_tags(tags: Any) -> str | list[str]:
+    if tags is _MISSING:
+        # the validator does not run on the default value
+        return []
+    if type(tags) is list and all(type(tag) is str for tag in tags):
+        return ",".join(tags)
+    raise _FastPathUnsupportedError
+
+
+def dump_project(payload: dict[str, Any]) -> dict[str, Any]:
+    """
+    Equivalent of Project(**payload).model_dump(by_alias=True), with cheap type checks
+    instead of a full validation. Payloads the fast path does not handle, including invalid
+    ones, go through the pydantic model.
+    """
+
+    try:
+        return _dump_project(payload)
+    except _FastPathUnsupportedError:
+        return Project(**payload).model_dump(by_alias=True)
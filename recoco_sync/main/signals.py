@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .lookups import webhook_config_cache
+from .models import WebhookConfig
+
+
+@receiver(post_save, sender=WebhookConfig)
+@receiver(post_delete, sender=WebhookConfig)
+def on_webhook_config_change(sender, instance: WebhookConfig, **kwargs):
+    webhook_config_cache.invalidate()
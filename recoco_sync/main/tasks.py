@@ -1,32 +1,205 @@
 from __future__ import annotations
 
+import time
+import traceback
+from datetime import timedelta
+from uuid import UUID
+
 from celery import shared_task
 from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
 
+from .catalogue import invalidate_question_catalogue
 from .choices import ObjectType, WebhookEventStatus
-from .connectors import get_connectors
-from .models import WebhookEvent
+from .clients import count_requests
+from .connectors import get_connector, get_connectors
+from .models import WebhookEvent, WebhookEventRun
+from .retention import compact_webhook_events, prune_webhook_events
 
 logger = get_task_logger(__name__)
 
 
+def resolve_event_object(event: WebhookEvent) -> tuple[int, ObjectType]:
+    if event.object_type in (ObjectType.SURVEY_ANSWER, ObjectType.TAGGEDITEM):
+        return int(event.object_data.get("project")), ObjectType.PROJECT
+    return int(event.object_id), ObjectType(event.object_type)
+
+
+def _get_related_pending_events(
+    event: WebhookEvent, object_id: int, object_type: ObjectType
+) -> models.QuerySet[WebhookEvent]:
+    """Pending events of the same webhook config which resolve to the same object."""
+
+    lookup = Q(object_type=object_type, object_id=str(object_id))
+    if object_type == ObjectType.PROJECT:
+        lookup |= Q(
+            object_type__in=(ObjectType.SURVEY_ANSWER, ObjectType.TAGGEDITEM),
+            payload__object__project=object_id,
+        )
+
+    return (
+        WebhookEvent.objects.filter(
+            webhook_config_id=event.webhook_config_id, status=WebhookEventStatus.PENDING
+        )
+        .filter(lookup, runs__isnull=True)
+        .exclude(id=event.id)
+    )
+
+
 @shared_task
-def process_webhook_event(event_id: int):
+def process_webhook_event(event_id: UUID):
+    for run_id in start_webhook_event_runs(event_id):
+        process_webhook_event_run.delay(run_id)
+
+
+def start_webhook_event_runs(event_id: UUID) -> list[UUID]:
+    """
+    Create the connector runs of a pending event, unless it is coalesced with a more recent
+    event, and return their ids.
+    """
+
     try:
         event = WebhookEvent.objects.select_related("webhook_config").get(id=event_id)
     except WebhookEvent.DoesNotExist:
         logger.error(f"WebhookEvent with id={event_id} does not exist")
+        return []
+
+    if event.status != WebhookEventStatus.PENDING or event.runs.exists():
+        return []
+
+    try:
+        object_id, object_type = resolve_event_object(event)
+    except (TypeError, ValueError) as exc:
+        logger.exception(f"WebhookEvent {event.id} does not resolve to an object")
+        event.status = WebhookEventStatus.FAILED
+        event.exception = repr(exc)
+        event.traceback = traceback.format_exc()
+        event.completed_at = timezone.now()
+        event.save()
+        return []
+
+    if object_type == ObjectType.SURVEY_QUESTION:
+        invalidate_question_catalogue(event.webhook_config.api_url)
+
+    related_events = _get_related_pending_events(event, object_id, object_type)
+    if related_events.filter(created__gt=event.created).exists():
+        # A more recent event will trigger the same connectors run
+        event.status = WebhookEventStatus.COALESCED
+        event.save()
+        return []
+
+    superseded_event_ids = list(
+        related_events.filter(created__lte=event.created).values_list("id", flat=True)
+    )
+
+    runs = WebhookEventRun.objects.bulk_create(
+        [WebhookEventRun(event=event, connector=connector.name) for connector in get_connectors()]
+    )
+
+    WebhookEvent.objects.filter(
+        id__in=superseded_event_ids, status=WebhookEventStatus.PENDING
+    ).update(status=WebhookEventStatus.COALESCED, modified=timezone.now())
+
+    if not runs:
+        _complete_webhook_event(event.id)
+
+    return [run.id for run in runs]
+
+
+@shared_task
+def process_webhook_events(event_ids: list[UUID]):
+    """Process a batch of events received together, in the order they were received."""
+
+    for event_id in event_ids:
+        process_webhook_event(event_id)
+
+
+@shared_task
+def process_webhook_event_runs(run_ids: list[UUID]):
+    """Publish again the connector runs redelivered by the outbox relay."""
+
+    for run_id in run_ids:
+        process_webhook_event_run.delay(run_id)
+
+
+@shared_task
+def process_webhook_event_run(run_id: UUID):
+    """Process a webhook event with a single connector."""
+
+    try:
+        run = WebhookEventRun.objects.select_related("event__webhook_config").get(id=run_id)
+    except WebhookEventRun.DoesNotExist:
+        logger.error(f"WebhookEventRun with id={run_id} does not exist")
         return
 
-    object_id: int | None = int(event.object_id)
-    object_type: ObjectType | None = ObjectType(event.object_type)
+    if run.status != WebhookEventStatus.PENDING:
+        return
 
-    if event.object_type in (ObjectType.SURVEY_ANSWER, ObjectType.TAGGEDITEM):
-        object_id = int(event.object_data.get("project"))
-        object_type = ObjectType.PROJECT
+    # claim the run, in case it is also being processed by a redelivered task
+    if not WebhookEventRun.objects.filter(
+        id=run.id, status=WebhookEventStatus.PENDING, started_at=run.started_at
+    ).update(started_at=timezone.now()):
+        return
+
+    run.started_at = timezone.now()
+    started = time.perf_counter()
+    with count_requests() as request_counter:
+        try:
+            object_id, object_type = resolve_event_object(run.event)
+            if (connector := get_connector(run.connector)) is None:
+                raise ValueError(f"Connector {run.connector} is not registered")
+            connector.on_webhook_event(
+                object_id=object_id, object_type=object_type, event=run.event
+            )
+        except Exception as exc:
+            logger.exception(
+                f"Connector {run.connector} failed to process WebhookEvent {run.event_id}"
+            )
+            run.status = WebhookEventStatus.FAILED
+            run.exception = repr(exc)
+            run.traceback = traceback.format_exc()
+        else:
+            run.status = WebhookEventStatus.PROCESSED
+    run.duration = timedelta(seconds=time.perf_counter() - started)
+    run.request_count = request_counter.count
+    run.save()
+
+    _complete_webhook_event(run.event_id)
+
+
+def _complete_webhook_event(event_id: UUID) -> None:
+    """Set the final status of the event once all its connector runs are finished."""
+
+    with transaction.atomic():
+        event = WebhookEvent.objects.select_for_update().get(id=event_id)
+        if event.status != WebhookEventStatus.PENDING:
+            return
+
+        runs = list(event.runs.only("connector", "status", "exception", "traceback"))
+        if any(run.status == WebhookEventStatus.PENDING for run in runs):
+            return
+
+        failed_runs = [run for run in runs if run.status == WebhookEventStatus.FAILED]
+        event.status = WebhookEventStatus.FAILED if failed_runs else WebhookEventStatus.PROCESSED
+        event.exception = "\n".join(f"{run.connector}: {run.exception}" for run in failed_runs)
+        event.traceback = "\n".join(f"{run.connector}:\n{run.traceback}" for run in failed_runs)
+        event.completed_at = timezone.now()
+        event.save()
+
+
+@shared_task
+def apply_webhook_events_retention():
+    """Archive, then delete, the processed webhook events according to the retention settings."""
 
-    for connector in get_connectors():
-        connector.on_webhook_event(object_id=object_id, object_type=object_type, event=event)
+    batch_size = settings.WEBHOOK_EVENT_RETENTION_BATCH_SIZE
 
-    event.status = WebhookEventStatus.PROCESSED
-    event.save()
+    compacted = compact_webhook_events(
+        older_than_days=settings.WEBHOOK_EVENT_ARCHIVE_DAYS, batch_size=batch_size
+    )
+    pruned = prune_webhook_events(
+        older_than_days=settings.WEBHOOK_EVENT_RETENTION_DAYS, batch_size=batch_size
+    )
+    logger.info(f"{compacted} webhook events compacted, {pruned} webhook events deleted")
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture
+def make_fake_connector() -> Callable[..., MagicMock]:
+    def make(name: str = "FakeConnector") -> MagicMock:
+        connector = MagicMock()
+        connector.name = name
+        return connector
+
+    return make
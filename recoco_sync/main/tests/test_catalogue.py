@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from django.conf import settings
+
+from recoco_sync.main.catalogue import (
+    QuestionCatalogue,
+    get_question_catalogue,
+    invalidate_question_catalogue,
+)
+from recoco_sync.main.clients import RecocoApiClient
+from recoco_sync.main.utils import QuestionType
+
+
+def test_question_catalogue():
+    catalogue = QuestionCatalogue(
+        [
+            {"slug": "budget-previsionnel", "text": "Budget prévisionnel", "choices": []},
+            {"slug": "maturite", "text_short": "Maturité", "is_multiple": True},
+        ]
+    )
+
+    assert [(q.col_id, q.label, q.question_type) for q in catalogue] == [
+        ("budget_previsionnel", "Budget prévisionnel", QuestionType.SIMPLE),
+        ("maturite", "Maturité", QuestionType.MULTIPLE_CHOICES),
+    ]
+
+    question = catalogue.get({"slug": "avec_projet", "choices": [{"text": "Oui"}, {"text": "Non"}]})
+    assert (question.col_id, question.label, question.question_type) == (
+        "avec_projet",
+        "Avec Projet",
+        QuestionType.YES_NO,
+    )
+    assert catalogue.get({"slug": "avec_projet"}) is question
+    assert len(catalogue) == 3
+
+
+def test_get_question_catalogue(respx_mock):
+    api_url = settings.RECOCO_API_URL_EXAMPLE
+    client = RecocoApiClient(api_url=api_url)
+
+    catalogue = get_question_catalogue(client)
+    assert [q.col_id for q in catalogue] == [
+        "thematiques",
+        "budget_previsionnel",
+        "maturite_du_projet",
+    ]
+    assert get_question_catalogue(client) is catalogue
+    assert _count_questions_requests(respx_mock) == 1
+
+    invalidate_question_catalogue(api_url)
+    assert get_question_catalogue(client) is not catalogue
+    assert _count_questions_requests(respx_mock) == 2
+
+
+def _count_questions_requests(respx_mock) -> int:
+    return len([c for c in respx_mock.calls if c.request.url.path.endswith("/survey/questions/")])
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import pytest
+
+from recoco_sync.main.checks import SHARED_CACHE_ALIAS_SETTINGS, check_shared_caches
+
+
+@pytest.mark.parametrize("setting", SHARED_CACHE_ALIAS_SETTINGS)
+def test_check_shared_caches(settings, setting):
+    settings.DEBUG = False
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "shared": {"BACKEND": "django.core.cache.backends.redis.RedisCache"},
+    }
+    for other_setting in SHARED_CACHE_ALIAS_SETTINGS:
+        setattr(settings, other_setting, "shared")
+
+    setattr(settings, setting, "default")
+    assert [warning.obj for warning in check_shared_caches(None)] == [setting]
+
+    setattr(settings, setting, "shared")
+    assert check_shared_caches(None) == []
+
+    setattr(settings, setting, "default")
+    settings.DEBUG = True
+    assert check_shared_caches(None) == []
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+from django.conf import settings
+
+from recoco_sync.main.clients import (
+    RecocoApiClient,
+    close_http_clients,
+    count_requests,
+    get_http_client,
+)
+from recoco_sync.main.utils import bounded_map
+
+
+@pytest.fixture
+def recoco_client():
+    return RecocoApiClient(api_url=settings.RECOCO_API_URL_EXAMPLE)
+
+
+def test_http_clients_are_shared_per_upstream():
+    client = RecocoApiClient(api_url=settings.RECOCO_API_URL_EXAMPLE)._client
+    assert RecocoApiClient(api_url=settings.RECOCO_API_URL_EXAMPLE)._client is client
+    assert RecocoApiClient(api_url="https://other.example.com/api")._client is not client
+    assert (
+        RecocoApiClient(api_url=settings.RECOCO_API_URL_EXAMPLE, timeout=60)._client is not client
+    )
+
+    close_http_clients()
+    assert client.is_closed
+    assert RecocoApiClient(api_url=settings.RECOCO_API_URL_EXAMPLE)._client is not client
+
+
+def test_count_requests(respx_mock):
+    respx_mock.get("https://counted.example.com/ping").mock(return_value=httpx.Response(200))
+    client = get_http_client("counted", base_url="https://counted.example.com")
+
+    client.get("/ping")
+    with count_requests() as counter:
+        client.get("/ping")
+        list(bounded_map(lambda _: client.get("/ping"), range(3), max_workers=2))
+        with count_requests() as nested_counter:
+            client.get("/ping")
+    client.get("/ping")
+
+    assert counter.count == 4
+    assert nested_counter.count == 1
+
+
+class TestRecocoApiClient:
+    def test_iter_results_follows_next_links(self, respx_mock, recoco_client):
+        api_url = settings.RECOCO_API_URL_EXAMPLE
+        # params patterns match on a subset, so the most specific route goes first
+        second_page = respx_mock.get(f"{api_url}/projects/", params={"offset": 2}).mock(
+            return_value=httpx.Response(
+                200, json={"count": 3, "next": None, "results": [{"id": 3}]}
+            )
+        )
+        first_page = respx_mock.get(f"{api_url}/projects/", params={"limit": 2}).mock(
+            return_value=httpx.Response(
+                200,
+                json={
+                    "count": 3,
+                    "next": f"{api_url}/projects/?limit=2&offset=2",
+                    "results": [{"id": 1}, {"id": 2}],
+                },
+            )
+        )
+
+        projects = list(recoco_client.iter_projects(page_size=2))
+
+        assert [p["id"] for p in projects] == [1, 2, 3]
+        assert first_page.called
+        assert second_page.called
+
+    def test_iter_results_without_pagination(self, respx_mock, recoco_client):
+        respx_mock.get(f"{settings.RECOCO_API_URL_EXAMPLE}/projects/").mock(
+            return_value=httpx.Response(200, json=[{"id": 1}, {"id": 2}])
+        )
+
+        assert [p["id"] for p in recoco_client.iter_projects()] == [1, 2]
+
+    def test_iter_survey_sessions(self, respx_mock, recoco_client):
+        route = respx_mock.get(
+            f"{settings.RECOCO_API_URL_EXAMPLE}/survey/sessions/",
+            params={"project_id": 7, "limit": settings.RECOCO_API_PAGE_SIZE},
+        ).mock(return_value=httpx.Response(200, json={"next": None, "results": [{"id": 70}]}))
+
+        assert list(recoco_client.iter_survey_sessions(project_id=7)) == [{"id": 70}]
+        assert route.called
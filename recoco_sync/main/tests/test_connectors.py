@@ -1,13 +1,27 @@
 from __future__ import annotations
 
+import threading
+import time
+from datetime import datetime
+
+import httpx
+import pytest
+from django.utils import timezone
+
 from recoco_sync.main.connectors import Connector
 
+from .factories import WebhookEventFactory
+
 
 class ConnectorStub(Connector):
     def on_webhook_event(self, object_id, object_type, event):
         pass
 
 
+class OtherConnectorStub(ConnectorStub):
+    pass
+
+
 class TestConnector:
     def test_map_from_project_payload_object(self, project_payload_object):
         data = ConnectorStub().map_from_project_payload_object(payload=project_payload_object)
@@ -41,3 +55,236 @@ class TestConnector:
             "thematiques": "Commerce rural,Participation à la vie locale,Patrimoine",
             "thematiques_comment": "Mon commentaire sur les thématiques",
         }
+
+    def test_fetch_projects_data(
+        self, settings, respx_mock, project_payload_object, survey_answer_payload_object
+    ):
+        settings.RECOCO_API_BULK_HYDRATION = False
+        api_url = settings.RECOCO_API_URL_EXAMPLE
+        for project_id in (1, 2, 3):
+            respx_mock.get(f"{api_url}/projects/{project_id}/").mock(
+                return_value=httpx.Response(200, json=project_payload_object | {"id": project_id})
+            )
+            respx_mock.get(f"{api_url}/survey/sessions/?project_id={project_id}").mock(
+                return_value=httpx.Response(
+                    200,
+                    json={"count": 1, "results": [{"id": project_id * 10}]}
+                    if project_id != 2
+                    else {"count": 0, "results": []},
+                )
+            )
+            respx_mock.get(f"{api_url}/survey/sessions/{project_id * 10}/answers/").mock(
+                return_value=httpx.Response(200, json={"results": [survey_answer_payload_object]})
+            )
+
+        results = list(ConnectorStub().fetch_projects_data(project_ids=[3, 1, 2], api_url=api_url))
+
+        assert [project_id for project_id, _ in results] == [3, 1, 2]
+        assert results[0][1]["thematiques"] == (
+            "Commerce rural,Participation à la vie locale,Patrimoine"
+        )
+        assert "thematiques" not in results[2][1]
+
+    def test_fetch_projects_data_concurrency_bound(
+        self, settings, respx_mock, project_payload_object, survey_answer_payload_object
+    ):
+        settings.RECOCO_API_BULK_HYDRATION = False
+        settings.RECOCO_API_MAX_CONCURRENCY = 3
+        settings.RECOCO_API_PAGE_SIZE = 1
+        api_url = settings.RECOCO_API_URL_EXAMPLE
+        lock = threading.Lock()
+        in_flight = max_in_flight = 0
+
+        def respond(json):
+            def side_effect(request):
+                nonlocal in_flight, max_in_flight
+                with lock:
+                    in_flight += 1
+                    max_in_flight = max(max_in_flight, in_flight)
+                time.sleep(0.01)
+                with lock:
+                    in_flight -= 1
+                return httpx.Response(200, json=json)
+
+            return side_effect
+
+        respx_mock.get(url__regex=rf"{api_url}/projects/(\d+)/").mock(
+            side_effect=lambda request: respond(
+                project_payload_object | {"id": int(request.url.path.split("/")[-2])}
+            )(request)
+        )
+        respx_mock.get(url__regex=r"/survey/sessions/\?project_id=\d+$").mock(
+            side_effect=respond({"count": 1, "results": [{"id": 10}]})
+        )
+        # the answers are paginated, so that the next page is prefetched in another thread
+        respx_mock.get(url__regex=r"/survey/sessions/10/answers/.*offset=1").mock(
+            side_effect=respond({"results": [survey_answer_payload_object]})
+        )
+        respx_mock.get(url__regex=r"/survey/sessions/10/answers/").mock(
+            side_effect=respond(
+                {"next": f"{api_url}/survey/sessions/10/answers/?offset=1", "results": []}
+            )
+        )
+
+        results = list(
+            ConnectorStub().fetch_projects_data(project_ids=list(range(1, 13)), api_url=api_url)
+        )
+
+        assert len(results) == 12
+        assert 1 < max_in_flight <= 3
+
+    @pytest.mark.django_db
+    def test_fetch_projects_data_cached_per_event(
+        self, settings, respx_mock, project_payload_object, survey_answer_payload_object
+    ):
+        settings.RECOCO_API_BULK_HYDRATION = False
+        api_url = settings.RECOCO_API_URL_EXAMPLE
+        project_route = respx_mock.get(f"{api_url}/projects/1/").mock(
+            return_value=httpx.Response(200, json=project_payload_object | {"id": 1})
+        )
+        respx_mock.get(f"{api_url}/survey/sessions/?project_id=1").mock(
+            return_value=httpx.Response(200, json={"count": 1, "results": [{"id": 10}]})
+        )
+        respx_mock.get(f"{api_url}/survey/sessions/10/answers/").mock(
+            return_value=httpx.Response(200, json={"results": [survey_answer_payload_object]})
+        )
+
+        event, other_event = WebhookEventFactory(), WebhookEventFactory()
+        results = [
+            list(ConnectorStub().fetch_projects_data(project_ids=[1], event=e, api_url=api_url))
+            for e in (event, event, other_event)
+        ]
+
+        assert project_route.call_count == 2
+        assert results[0] == results[1] == results[2]
+        assert results[0][0][1]["thematiques"] == (
+            "Commerce rural,Participation à la vie locale,Patrimoine"
+        )
+
+    @pytest.mark.django_db
+    def test_fetch_projects_data_cache_hit_for_other_connector(
+        self, settings, respx_mock, project_payload_object
+    ):
+        settings.RECOCO_API_BULK_HYDRATION = False
+        api_url = settings.RECOCO_API_URL_EXAMPLE
+        project_route = respx_mock.get(f"{api_url}/projects/1/").mock(
+            return_value=httpx.Response(200, json=project_payload_object | {"id": 1})
+        )
+        sessions_route = respx_mock.get(f"{api_url}/survey/sessions/?project_id=1").mock(
+            return_value=httpx.Response(200, json={"count": 0, "results": []})
+        )
+
+        event = WebhookEventFactory()
+        first = list(
+            ConnectorStub().fetch_projects_data(project_ids=[1], event=event, api_url=api_url)
+        )
+        second = list(
+            OtherConnectorStub().fetch_projects_data(project_ids=[1], event=event, api_url=api_url)
+        )
+
+        assert first == second
+        assert project_route.call_count == 1
+        assert sessions_route.call_count == 1
+
+    @pytest.fixture
+    def bulk_routes(self, settings, respx_mock, project_payload_object):
+        api_url = settings.RECOCO_API_URL_EXAMPLE
+        respx_mock.get(f"{api_url}/projects/").mock(
+            return_value=httpx.Response(
+                200,
+                json=[project_payload_object | {"id": project_id} for project_id in (1, 2, 3)],
+            )
+        )
+        return api_url
+
+    def test_fetch_projects_data_bulk(
+        self, settings, respx_mock, bulk_routes, survey_answer_payload_object
+    ):
+        settings.RECOCO_API_BULK_HYDRATION = True
+        sessions_route = respx_mock.get(
+            f"{bulk_routes}/survey/sessions/", params={"project_id__in": "1,2,3"}
+        ).mock(
+            return_value=httpx.Response(
+                200,
+                json={
+                    "next": None,
+                    "results": [{"id": 10, "project": 1}, {"id": 30, "project": 3}],
+                },
+            )
+        )
+        answers_route = respx_mock.get(
+            f"{bulk_routes}/survey/answers/", params={"session_id__in": "10,30"}
+        ).mock(
+            return_value=httpx.Response(
+                200,
+                json={"next": None, "results": [survey_answer_payload_object | {"session": 30}]},
+            )
+        )
+
+        results = dict(ConnectorStub().fetch_projects_data(api_url=bulk_routes))
+
+        assert list(results.keys()) == [1, 2, 3]
+        assert "thematiques" not in results[1]
+        assert "thematiques" not in results[2]
+        assert "thematiques" in results[3]
+        assert sessions_route.call_count == 1
+        assert answers_route.call_count == 1
+
+    def test_fetch_projects_data_bulk_fallback(
+        self, settings, respx_mock, bulk_routes, survey_answer_payload_object
+    ):
+        settings.RECOCO_API_BULK_HYDRATION = True
+        # the filter on project ids is ignored, sessions of other projects are returned
+        respx_mock.get(f"{bulk_routes}/survey/sessions/", params={"project_id__in": "1,2,3"}).mock(
+            return_value=httpx.Response(
+                200, json={"next": None, "results": [{"id": 90, "project": 9}]}
+            )
+        )
+        per_project_route = respx_mock.get(f"{bulk_routes}/survey/sessions/").mock(
+            return_value=httpx.Response(200, json={"count": 0, "results": []})
+        )
+
+        results = dict(ConnectorStub().fetch_projects_data(api_url=bulk_routes))
+
+        assert list(results.keys()) == [1, 2, 3]
+        assert per_project_route.call_count == 3
+
+    def test_fetch_projects_data_modified_since(self, settings, respx_mock, project_payload_object):
+        settings.RECOCO_API_BULK_HYDRATION = False
+        api_url = settings.RECOCO_API_URL_EXAMPLE
+        projects_route = respx_mock.get(f"{api_url}/projects/").mock(
+            return_value=httpx.Response(
+                200,
+                json=[
+                    project_payload_object | {"id": 1, "updated_on": "2024-05-24T10:54:21+02:00"},
+                    project_payload_object | {"id": 2, "updated_on": "2024-06-24T10:54:21+02:00"},
+                ],
+            )
+        )
+        respx_mock.get(f"{api_url}/survey/sessions/").mock(
+            return_value=httpx.Response(200, json={"count": 0, "results": []})
+        )
+
+        modified_since = datetime.fromisoformat("2024-06-01T00:00:00+02:00")
+        results = list(
+            ConnectorStub().fetch_projects_data(modified_since=modified_since, api_url=api_url)
+        )
+
+        assert [project_id for project_id, _ in results] == [2]
+        assert projects_route.calls[0].request.url.params["updated_on__gte"] == (
+            modified_since.isoformat()
+        )
+
+    @pytest.mark.parametrize(
+        "modified,expected",
+        [
+            ("2024-06-24T10:54:21+02:00", True),
+            ("2024-05-24T10:54:21+02:00", False),
+            ("2024-06-24T10:54:21", True),
+            ("2024-05-24T10:54:21", False),
+            (None, True),
+        ],
+    )
+    def test_is_modified_since(self, modified, expected):
+        modified_since = timezone.make_aware(datetime(2024, 6, 1))
+        assert Connector._is_modified_since({"updated_on": modified}, modified_since) is expected
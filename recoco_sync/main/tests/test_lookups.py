@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import pytest
+
+from recoco_sync.main.lookups import (
+    WebhookConfigCache,
+    WebhookConfigEntry,
+    webhook_config_cache,
+)
+
+from .factories import WebhookConfigFactory
+
+
+@pytest.mark.django_db
+def test_webhook_config_cache(django_assert_num_queries):
+    config = WebhookConfigFactory()
+    cache = WebhookConfigCache()
+
+    with django_assert_num_queries(1):
+        assert cache.get(config.code) == WebhookConfigEntry(
+            id=config.id, enabled=True, api_url=config.api_url
+        )
+        assert cache.get(config.code).id == config.id
+        assert cache.get("unknown") is None
+
+    cache.invalidate()
+    with django_assert_num_queries(1):
+        assert cache.get("unknown") is None
+
+
+@pytest.mark.django_db
+def test_webhook_config_cache_expired(settings, django_assert_num_queries):
+    settings.WEBHOOK_CONFIG_CACHE_TIMEOUT = 0
+    config = WebhookConfigFactory()
+    cache = WebhookConfigCache()
+
+    with django_assert_num_queries(2):
+        cache.get(config.code)
+        cache.get(config.code)
+
+
+@pytest.mark.django_db
+def test_webhook_config_cache_invalidated_on_change():
+    config = WebhookConfigFactory()
+    assert webhook_config_cache.get(config.code).enabled is True
+
+    config.enabled = False
+    config.save()
+    assert webhook_config_cache.get(config.code).enabled is False
+
+    config.delete()
+    assert webhook_config_cache.get(config.code) is None
@@ -1,8 +1,17 @@
 from __future__ import annotations
 
+from datetime import timedelta
+from io import StringIO
+
 import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from recoco_sync.main.choices import WebhookEventStatus
+from recoco_sync.main.models import WebhookEvent
+from recoco_sync.utils.compression import compress_json, decompress_json, is_zstd_available
 
-from .factories import WebhookConfigFactory
+from .factories import WebhookConfigFactory, WebhookEventFactory
 
 
 @pytest.mark.django_db
@@ -14,3 +23,64 @@ def test_webhook_config_code():
 
     config3 = WebhookConfigFactory(code="test")
     assert config3.code == "test"
+
+
+@pytest.mark.parametrize("codec", ["zlib", "zstd"])
+def test_compress_json(codec):
+    if codec == "zstd" and not is_zstd_available():
+        pytest.skip("zstd is not available")
+
+    value = {"object": {"id": 1, "name": "Projet", "tags": ["a", "b"]}}
+    data = compress_json(value, codec=codec)
+    assert isinstance(data, bytes)
+    assert decompress_json(data) == value
+    assert decompress_json(memoryview(data)) == value
+
+
+def test_compress_json_unknown_codec():
+    with pytest.raises(ValueError):
+        compress_json({}, codec="lzma")
+
+
+@pytest.mark.django_db
+def test_webhook_event_archive(settings):
+    settings.WEBHOOK_STORED_HEADERS = ["Content-Type"]
+    event = WebhookEventFactory(
+        payload={"object": {"id": 1, "project": 2}},
+        headers={"content-type": "application/json", "Cookie": "secret"},
+    )
+
+    event.archive()
+    event.save()
+
+    event.refresh_from_db()
+    assert event.is_archived
+    assert event.payload == {}
+    assert event.get_payload() == {"object": {"id": 1, "project": 2}}
+    assert event.object_data == {"id": 1, "project": 2}
+    assert event.headers == {"content-type": "application/json"}
+
+
+@pytest.mark.django_db
+def test_compact_webhook_events_command():
+    old_event = WebhookEventFactory(
+        payload={"object": {"id": 1}}, status=WebhookEventStatus.PROCESSED
+    )
+    pending_event = WebhookEventFactory(payload={"object": {"id": 2}})
+    recent_event = WebhookEventFactory(
+        payload={"object": {"id": 3}}, status=WebhookEventStatus.PROCESSED
+    )
+    WebhookEvent.objects.filter(id__in=[old_event.id, pending_event.id]).update(
+        created=timezone.now() - timedelta(days=30)
+    )
+
+    out = StringIO()
+    call_command("compact_webhook_events", "--older-than-days=7", "--batch-size=1", stdout=out)
+    assert "1 webhook events compacted" in out.getvalue()
+
+    for event in (old_event, pending_event, recent_event):
+        event.refresh_from_db()
+    assert old_event.is_archived
+    assert old_event.object_data == {"id": 1}
+    assert not pending_event.is_archived
+    assert not recent_event.is_archived
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+
+from recoco_sync.main.choices import WebhookEventStatus
+from recoco_sync.main.models import WebhookEvent, WebhookEventRun
+from recoco_sync.main.outbox import relay_webhook_event_runs, relay_webhook_events
+from recoco_sync.main.tasks import (
+    process_webhook_event,
+    process_webhook_event_run,
+    process_webhook_event_runs,
+)
+
+from .factories import WebhookEventFactory
+
+
+@pytest.fixture(autouse=True)
+def no_coalescing_window(settings):
+    settings.WEBHOOK_COALESCING_WINDOW = 0
+    settings.WEBHOOK_OUTBOX_REDELIVERY_TIMEOUT = 600
+
+
+@pytest.mark.django_db
+def test_relay_webhook_events():
+    events = WebhookEventFactory.create_batch(3)
+    WebhookEventFactory(status=WebhookEventStatus.PROCESSED)
+
+    with patch("recoco_sync.main.outbox.process_webhook_events.delay") as mock_delay:
+        assert relay_webhook_events(batch_size=2) == 2
+        assert relay_webhook_events(batch_size=2) == 1
+        assert relay_webhook_events(batch_size=2) == 0
+
+    assert mock_delay.call_count == 2
+    published_ids = [event_id for call in mock_delay.call_args_list for event_id in call.args[0]]
+    assert published_ids == [event.id for event in events]
+    assert not WebhookEvent.objects.filter(
+        status=WebhookEventStatus.PENDING, dispatched_at__isnull=True
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_relay_webhook_events_coalescing_window(settings):
+    settings.WEBHOOK_COALESCING_WINDOW = 60
+    WebhookEventFactory()
+
+    with patch("recoco_sync.main.outbox.process_webhook_events.delay") as mock_delay:
+        assert relay_webhook_events() == 0
+    mock_delay.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_relay_webhook_events_broker_down():
+    event = WebhookEventFactory()
+
+    with (
+        patch(
+            "recoco_sync.main.outbox.process_webhook_events.delay",
+            side_effect=ConnectionError,
+        ),
+        pytest.raises(ConnectionError),
+    ):
+        relay_webhook_events()
+
+    event.refresh_from_db()
+    assert event.dispatched_at is None
+
+
+@pytest.mark.django_db
+def test_relay_webhook_events_redelivery():
+    long_ago = timezone.now() - timedelta(hours=1)
+    lost_event = WebhookEventFactory(dispatched_at=long_ago)
+    running_event = WebhookEventFactory(dispatched_at=long_ago)
+    WebhookEventRun.objects.create(event=running_event, connector="FakeConnector")
+    WebhookEventFactory(dispatched_at=timezone.now())
+
+    with patch("recoco_sync.main.outbox.process_webhook_events.delay") as mock_delay:
+        assert relay_webhook_events() == 1
+    mock_delay.assert_called_once_with([lost_event.id])
+
+
+@pytest.mark.django_db
+def test_relay_webhook_events_command():
+    WebhookEventFactory()
+
+    out = StringIO()
+    with patch("recoco_sync.main.outbox.process_webhook_events.delay") as mock_delay:
+        call_command("relay_webhook_events", "--once", stdout=out)
+
+    mock_delay.assert_called_once()
+    assert "1 webhook events published" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_relay_webhook_events_command_survives_errors():
+    event = WebhookEventFactory()
+
+    out = StringIO()
+    with (
+        patch(
+            "recoco_sync.main.outbox.process_webhook_events.delay",
+            side_effect=[OperationalError, None],
+        ) as mock_delay,
+        patch(
+            "recoco_sync.main.management.commands.relay_webhook_events.time.sleep",
+            side_effect=[None, KeyboardInterrupt],
+        ) as mock_sleep,
+    ):
+        call_command("relay_webhook_events", "--interval=5", stdout=out)
+
+    assert mock_delay.call_count == 2
+    mock_sleep.assert_called_with(5)
+    assert "1 webhook events published" in out.getvalue()
+    event.refresh_from_db()
+    assert event.dispatched_at is not None
+
+
+@pytest.mark.django_db
+def test_relay_webhook_event_runs_lost_after_creation(settings, make_fake_connector):
+    event = WebhookEventFactory()
+    connectors = [make_fake_connector("A"), make_fake_connector("B")]
+
+    with (
+        patch("recoco_sync.main.connectors.connectors", connectors),
+        patch(
+            "recoco_sync.main.tasks.process_webhook_event_run.delay",
+            side_effect=OperationalError,
+        ),
+        pytest.raises(OperationalError),
+    ):
+        process_webhook_event(event.id)
+
+    run_ids = list(event.runs.values_list("id", flat=True))
+    assert len(run_ids) == 2
+
+    with patch("recoco_sync.main.outbox.process_webhook_event_runs.delay") as mock_delay:
+        assert relay_webhook_event_runs() == 0
+
+        settings.WEBHOOK_OUTBOX_REDELIVERY_TIMEOUT = 0
+        assert relay_webhook_event_runs() == 2
+    mock_delay.assert_called_once()
+    assert sorted(mock_delay.call_args.args[0]) == sorted(run_ids)
+
+    with (
+        patch("recoco_sync.main.connectors.connectors", connectors),
+        patch(
+            "recoco_sync.main.tasks.process_webhook_event_run.delay",
+            side_effect=process_webhook_event_run,
+        ),
+    ):
+        process_webhook_event_runs(mock_delay.call_args.args[0])
+
+    event.refresh_from_db()
+    assert event.status == WebhookEventStatus.PROCESSED
+    assert all(connector.on_webhook_event.call_count == 1 for connector in connectors)
+
+
+@pytest.mark.django_db
+def test_relay_webhook_event_runs_started(settings):
+    settings.WEBHOOK_OUTBOX_REDELIVERY_TIMEOUT = 0
+    settings.CELERY_TASK_TIME_LIMIT = 1800
+    long_ago = timezone.now() - timedelta(hours=1)
+    WebhookEventRun.objects.create(
+        event=WebhookEventFactory(), connector="A", started_at=timezone.now()
+    )
+    dead = WebhookEventRun.objects.create(
+        event=WebhookEventFactory(), connector="A", started_at=long_ago, dispatched_at=long_ago
+    )
+
+    with patch("recoco_sync.main.outbox.process_webhook_event_runs.delay") as mock_delay:
+        assert relay_webhook_event_runs() == 1
+    mock_delay.assert_called_once_with([dead.id])
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from email.utils import format_datetime
+from unittest.mock import patch
+
+import httpcore
+import httpx
+import pytest
+from django.utils import timezone
+
+from recoco_sync.grist_connector.tests.factories import GristConfigFactory
+from recoco_sync.main.clients import get_http_client
+from recoco_sync.main.ratelimit import CacheTokenBucket, RateLimit, get_retry_after
+
+
+@pytest.fixture
+def frozen_now():
+    with patch.object(CacheTokenBucket, "now", return_value=1_000_000_000) as mock_now:
+        yield mock_now
+
+
+def test_token_bucket_reserve(frozen_now):
+    bucket = CacheTokenBucket("example.com", RateLimit(rate=10, burst=2))
+
+    assert [bucket.reserve() for _ in range(4)] == [0, 0, 0.1, 0.2]
+
+    # once idle, the bucket is full again
+    frozen_now.return_value += 10_000_000
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0.1]
+
+
+def test_token_bucket_is_shared_per_key(frozen_now):
+    limit = RateLimit(rate=1)
+    CacheTokenBucket("example.com", limit).reserve()
+
+    assert CacheTokenBucket("example.com", limit).reserve() == 1
+    assert CacheTokenBucket("other.example.com", limit).reserve() == 0
+
+
+def test_token_bucket_pause(frozen_now):
+    bucket = CacheTokenBucket("example.com", RateLimit(rate=10, burst=5))
+    bucket.reserve()
+
+    bucket.pause(5)
+
+    assert bucket.reserve() == 5
+    assert bucket.reserve() == pytest.approx(5.1)
+
+
+def test_get_retry_after():
+    assert get_retry_after(httpx.Response(429, headers={"Retry-After": "3"}), attempt=0) == 3
+    retry_at = format_datetime(timezone.now() + timedelta(seconds=30), usegmt=True)
+    assert 28 < get_retry_after(httpx.Response(429, headers={"Retry-After": retry_at}), 0) <= 30
+    assert get_retry_after(httpx.Response(429), attempt=2) == 4
+
+
+@pytest.mark.parametrize(
+    "responses, expected_status, expected_sleeps",
+    [
+        (
+            [httpx.Response(429, headers={"Retry-After": "2"}), httpx.Response(200)],
+            200,
+            [2],
+        ),
+        ([httpx.Response(503), httpx.Response(200)], 503, []),
+        ([httpx.Response(429)] * 5, 429, [1, 2, 4]),
+    ],
+)
+def test_rate_limited_transport_retries(respx_mock, responses, expected_status, expected_sleeps):
+    route = respx_mock.get("https://limited.example.com/ping").mock(side_effect=responses)
+    client = get_http_client(
+        ("limited", expected_status),
+        rate_limit=RateLimit(rate=1000, burst=1000),
+        base_url="https://limited.example.com",
+    )
+
+    with patch("recoco_sync.main.ratelimit.time.sleep") as mock_sleep:
+        response = client.get("/ping")
+
+    assert response.status_code == expected_status
+    assert route.call_count == len(expected_sleeps) + 1
+    assert [pytest.approx(call.args[0], abs=0.1) for call in mock_sleep.call_args_list] == (
+        expected_sleeps
+    )
+
+
+def test_rate_limited_transport_throttles(respx_mock):
+    respx_mock.get("https://throttled.example.com/ping").mock(return_value=httpx.Response(200))
+    client = get_http_client(
+        "throttled", rate_limit=RateLimit(rate=10), base_url="https://throttled.example.com"
+    )
+
+    with patch("recoco_sync.main.ratelimit.time.sleep") as mock_sleep:
+        for _ in range(3):
+            client.get("/ping")
+
+    assert mock_sleep.call_count == 2
+
+
+@pytest.mark.django_db
+def test_config_rate_limit(settings):
+    settings.GRIST_API_RATE_LIMIT = 10.0
+    settings.GRIST_API_RATE_LIMIT_BURST = 5
+
+    assert GristConfigFactory().get_rate_limit() == RateLimit(rate=10.0, burst=5)
+    assert GristConfigFactory(rate_limit=2.5, rate_limit_burst=1).get_rate_limit() == RateLimit(
+        rate=2.5, burst=1
+    )
+    assert GristConfigFactory(rate_limit=0).get_rate_limit().rate == 0
+
+
+@pytest.mark.parametrize("rate", [0, 10])
+def test_http_client_uses_environment_proxy(monkeypatch, rate):
+    monkeypatch.setenv("HTTPS_PROXY", "http://proxy.example.com:3128")
+    monkeypatch.setenv("NO_PROXY", "direct.example.com")
+
+    proxied_client = get_http_client(
+        ("proxied", rate), rate_limit=RateLimit(rate=rate), base_url="https://proxied.example.com"
+    )
+    direct_client = get_http_client(
+        ("direct", rate), rate_limit=RateLimit(rate=rate), base_url="https://direct.example.com"
+    )
+
+    def get_pool(client: httpx.Client, url: str):
+        transport = client._transport_for_url(httpx.URL(url))
+        return getattr(transport, "transport", transport)._pool
+
+    assert isinstance(get_pool(proxied_client, "https://proxied.example.com"), httpcore.HTTPProxy)
+    assert not isinstance(get_pool(direct_client, "https://direct.example.com"), httpcore.HTTPProxy)
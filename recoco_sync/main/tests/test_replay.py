@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from recoco_sync.main.admin import WebhookEventAdmin
+from recoco_sync.main.choices import ObjectType, WebhookEventStatus
+from recoco_sync.main.models import WebhookEvent, WebhookEventRun
+from recoco_sync.main.outbox import get_dispatchable_webhook_events
+from recoco_sync.main.replay import (
+    Throttle,
+    replay_webhook_events,
+    reset_events_for_replay,
+    select_events_to_replay,
+)
+
+from .factories import WebhookConfigFactory, WebhookEventFactory
+
+
+@pytest.fixture
+def failed_events():
+    config = WebhookConfigFactory()
+    project_event = WebhookEventFactory(
+        webhook_config=config, object_id=1, status=WebhookEventStatus.FAILED
+    )
+    answer_event = WebhookEventFactory(
+        webhook_config=config,
+        object_id=10,
+        object_type=ObjectType.SURVEY_ANSWER,
+        payload={"object": {"id": 10, "project": 1}},
+        status=WebhookEventStatus.FAILED,
+    )
+    other_project_event = WebhookEventFactory(webhook_config=config, object_id=2)
+    WebhookEventRun.objects.create(
+        event=project_event, connector="FakeConnector", status=WebhookEventStatus.FAILED
+    )
+    return project_event, answer_event, other_project_event
+
+
+@pytest.mark.django_db
+def test_select_events_to_replay(failed_events):
+    project_event, answer_event, other_project_event = failed_events
+
+    selection = select_events_to_replay(WebhookEvent.objects.all())
+
+    assert selection.event_ids == [answer_event.id, other_project_event.id]
+    assert selection.duplicate_event_ids == [project_event.id]
+
+
+@pytest.mark.django_db
+def test_replay_webhook_events_command(failed_events, make_fake_connector):
+    project_event, answer_event, other_project_event = failed_events
+    fake_connector = make_fake_connector()
+
+    out = StringIO()
+    with patch("recoco_sync.main.connectors.connectors", [fake_connector]):
+        call_command(
+            "replay_webhook_events", "--concurrency=1", "--batch-size=1", "--rate=1000", stdout=out
+        )
+
+    assert "2 webhook events to replay, 1 duplicates to coalesce" in out.getvalue()
+    assert "2/2 webhook events replayed" in out.getvalue()
+    assert fake_connector.on_webhook_event.call_count == 2
+
+    for event in failed_events:
+        event.refresh_from_db()
+    assert project_event.status == WebhookEventStatus.COALESCED
+    assert answer_event.status == WebhookEventStatus.PROCESSED
+    assert other_project_event.status == WebhookEventStatus.PROCESSED
+    # the history of the duplicates is kept
+    assert project_event.runs.get().status == WebhookEventStatus.FAILED
+
+
+@pytest.mark.django_db
+def test_replay_outlives_redelivery_timeout(settings, failed_events, make_fake_connector):
+    settings.WEBHOOK_OUTBOX_REDELIVERY_TIMEOUT = 0
+    settings.WEBHOOK_COALESCING_WINDOW = 0
+    selection = select_events_to_replay(WebhookEvent.objects.all())
+    reset_events_for_replay(selection, dispatched=True)
+
+    assert WebhookEvent.objects.filter(status=WebhookEventStatus.REPLAYING).count() == 2
+    assert not get_dispatchable_webhook_events().exists()
+
+    dispatchable_counts = []
+    with patch("recoco_sync.main.connectors.connectors", [make_fake_connector()]):
+        replay_webhook_events(
+            selection.event_ids,
+            batch_size=1,
+            on_batch_done=lambda _: dispatchable_counts.append(
+                get_dispatchable_webhook_events().count()
+            ),
+        )
+
+    assert dispatchable_counts == [0, 0]
+    assert WebhookEvent.objects.filter(status=WebhookEventStatus.PROCESSED).count() == 2
+
+
+@pytest.mark.django_db
+def test_replay_webhook_events_command_filters(failed_events):
+    out = StringIO()
+    call_command(
+        "replay_webhook_events",
+        "--status=FAILED",
+        f"--object-type={ObjectType.PROJECT}",
+        "--since=2000-01-01",
+        "--dry-run",
+        stdout=out,
+    )
+    assert "1 webhook events to replay, 0 duplicates to coalesce" in out.getvalue()
+    assert WebhookEvent.objects.filter(status=WebhookEventStatus.FAILED).count() == 2
+
+    with pytest.raises(CommandError):
+        call_command("replay_webhook_events", "--since=yesterday", stdout=out)
+
+
+@pytest.mark.django_db
+def test_replay_webhook_events_command_enqueue(failed_events):
+    call_command("replay_webhook_events", "--enqueue", stdout=StringIO())
+
+    replayed_events = WebhookEvent.objects.filter(status=WebhookEventStatus.PENDING)
+    assert replayed_events.count() == 2
+    assert not replayed_events.filter(dispatched_at__isnull=False).exists()
+    assert not WebhookEventRun.objects.filter(event__in=replayed_events).exists()
+
+
+@pytest.mark.django_db
+def test_replay_events_admin_action(failed_events):
+    project_event, answer_event, _ = failed_events
+    admin = WebhookEventAdmin(model=WebhookEvent, admin_site=None)
+
+    with patch.object(admin, "message_user") as mock_message_user:
+        admin.replay_events(
+            request=None,
+            queryset=WebhookEvent.objects.filter(id__in=[project_event.id, answer_event.id]),
+        )
+
+    mock_message_user.assert_called_once()
+    answer_event.refresh_from_db()
+    assert answer_event.status == WebhookEventStatus.PENDING
+    assert answer_event.dispatched_at is None
+
+
+def test_throttle():
+    throttle = Throttle(rate=10)
+    with patch("recoco_sync.main.replay.time.sleep") as mock_sleep:
+        for _ in range(3):
+            throttle.wait()
+    assert mock_sleep.call_count == 2
+    assert all(0 < call.args[0] <= 0.2 for call in mock_sleep.call_args_list)
+
+    with patch("recoco_sync.main.replay.time.sleep") as mock_sleep:
+        Throttle().wait()
+    mock_sleep.assert_not_called()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from pydantic import ValidationError
+
+from recoco_sync.main.schemas import Project, dump_project
+
+
+def _without(payload, *keys):
+    return {k: v for k, v in payload.items() if k not in keys}
+
+
+@pytest.mark.parametrize(
+    "transform",
+    [
+        lambda p: p,
+        lambda p: _without(p, "tags"),
+        lambda p: p | {"tags": []},
+        lambda p: p | {"latitude": 47, "longitude": None},
+        lambda p: p | {"latitude": "47.12"},
+        lambda p: p | {"inactive_since": "2024-01-01"},
+        lambda p: (
+            p
+            | {"commune": None, "commune_name": "Nantes", "commune_insee": None}
+            | {"commune_postal": None, "commune_department": None, "commune_department_code": None}
+        ),
+        lambda p: p | {"commune": p["commune"] | {"department": {"name": "Dep", "code": "1"}}},
+        lambda p: _without(p, "created_on") | {"created": "2024-01-01"},
+        lambda p: p | {"organization": "Other", "modified": "2024-01-01"},
+        lambda p: p | {"tags": ("a", "b")},
+    ],
+)
+def test_dump_project_parity(project_payload_object, transform):
+    payload = transform(project_payload_object)
+    assert dump_project(payload) == Project(**payload).model_dump(by_alias=True)
+
+
+@pytest.mark.parametrize(
+    "transform",
+    [
+        lambda p: _without(p, "name"),
+        lambda p: p | {"status": None},
+        lambda p: p | {"commune": None},
+        lambda p: p | {"tags": [1]},
+    ],
+)
+def test_dump_project_invalid(project_payload_object, transform):
+    payload = transform(project_payload_object)
+    with pytest.raises(ValidationError):
+        Project(**payload)
+    with pytest.raises(ValidationError):
+        dump_project(payload)
+
+
+def test_benchmark_project_mapping_command():
+    out = StringIO()
+    call_command("benchmark_project_mapping", count=20, repeat=1, stdout=out, stderr=out)
+    assert "differ" not in out.getvalue()
+    assert "speedup" in out.getvalue()
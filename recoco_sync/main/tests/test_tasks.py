@@ -1,15 +1,36 @@
 from __future__ import annotations
 
-from unittest.mock import MagicMock, Mock, patch
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 
+import httpx
 import pytest
+from django.core.management import call_command
+from django.utils import timezone
 
 from recoco_sync.main.choices import ObjectType, WebhookEventStatus
-from recoco_sync.main.tasks import process_webhook_event
+from recoco_sync.main.clients import get_http_client
+from recoco_sync.main.models import WebhookEvent, WebhookEventRun
+from recoco_sync.main.tasks import (
+    apply_webhook_events_retention,
+    process_webhook_event,
+    process_webhook_event_run,
+    process_webhook_events,
+)
 
 from .factories import WebhookEventFactory
 
 
+@pytest.fixture(autouse=True)
+def eager_webhook_event_runs():
+    with patch(
+        "recoco_sync.main.tasks.process_webhook_event_run.delay",
+        side_effect=process_webhook_event_run,
+    ) as mock_delay:
+        yield mock_delay
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     "object_id, object_type, object_payload, expected_object_id, expected_object_type",
@@ -20,7 +41,12 @@ from .factories import WebhookEventFactory
     ],
 )
 def test_task_triggered_and_event_saved(
-    object_id, object_type, object_payload, expected_object_id, expected_object_type
+    object_id,
+    object_type,
+    object_payload,
+    expected_object_id,
+    expected_object_type,
+    make_fake_connector,
 ):
     event = WebhookEventFactory(
         object_id=object_id,
@@ -28,9 +54,9 @@ def test_task_triggered_and_event_saved(
         payload={"object": object_payload},
     )
 
-    fake_connector = MagicMock()
+    fake_connector = make_fake_connector()
 
-    with patch("recoco_sync.main.tasks.get_connectors", Mock(return_value=[fake_connector])):
+    with patch("recoco_sync.main.connectors.connectors", [fake_connector]):
         process_webhook_event(event_id=event.id)
 
     fake_connector.on_webhook_event.assert_called_once_with(
@@ -46,3 +72,286 @@ def test_event_does_not_exist():
     with patch("recoco_sync.main.tasks.logger.error") as logger_mock:
         process_webhook_event(event_id=1)
     logger_mock.assert_called_once_with("WebhookEvent with id=1 does not exist")
+
+
+@pytest.mark.django_db
+def test_related_events_coalesced(make_fake_connector):
+    project_event = WebhookEventFactory(
+        object_id=999, object_type=ObjectType.PROJECT, payload={"object": {"id": 999}}
+    )
+    answer_events = [
+        WebhookEventFactory(
+            webhook_config=project_event.webhook_config,
+            object_id=object_id,
+            object_type=ObjectType.SURVEY_ANSWER,
+            payload={"object": {"id": object_id, "project": 999}},
+        )
+        for object_id in (1, 2)
+    ]
+    other_project_event = WebhookEventFactory(
+        webhook_config=project_event.webhook_config,
+        object_id=3,
+        object_type=ObjectType.SURVEY_ANSWER,
+        payload={"object": {"id": 3, "project": 111}},
+    )
+
+    fake_connector = make_fake_connector()
+
+    with patch("recoco_sync.main.connectors.connectors", [fake_connector]):
+        for event in (project_event, *answer_events):
+            process_webhook_event(event_id=event.id)
+
+    fake_connector.on_webhook_event.assert_called_once_with(
+        object_id=999, object_type=ObjectType.PROJECT, event=answer_events[-1]
+    )
+
+    for event in (project_event, answer_events[0]):
+        event.refresh_from_db()
+        assert event.status == WebhookEventStatus.COALESCED
+    answer_events[-1].refresh_from_db()
+    assert answer_events[-1].status == WebhookEventStatus.PROCESSED
+    other_project_event.refresh_from_db()
+    assert other_project_event.status == WebhookEventStatus.PENDING
+
+
+@pytest.mark.django_db
+def test_superseded_events_coalesced_after_run(make_fake_connector):
+    events = [WebhookEventFactory(object_id=999) for _ in range(3)]
+    for event in events[1:]:
+        event.webhook_config = events[0].webhook_config
+        event.save()
+
+    fake_connector = make_fake_connector()
+
+    with patch("recoco_sync.main.connectors.connectors", [fake_connector]):
+        process_webhook_event(event_id=events[-1].id)
+        for event in events[:-1]:
+            process_webhook_event(event_id=event.id)
+
+    assert fake_connector.on_webhook_event.call_count == 1
+    assert [e.status for e in WebhookEvent.objects.order_by("created")] == [
+        WebhookEventStatus.COALESCED,
+        WebhookEventStatus.COALESCED,
+        WebhookEventStatus.PROCESSED,
+    ]
+
+
+@pytest.mark.django_db
+def test_connectors_run_independently(make_fake_connector):
+    event = WebhookEventFactory(object_id=999)
+    failing_connector = make_fake_connector("FailingConnector")
+    failing_connector.on_webhook_event.side_effect = ValueError("boom")
+    fake_connector = make_fake_connector()
+
+    with patch("recoco_sync.main.connectors.connectors", [failing_connector, fake_connector]):
+        process_webhook_event(event_id=event.id)
+
+    fake_connector.on_webhook_event.assert_called_once()
+
+    event.refresh_from_db()
+    assert event.status == WebhookEventStatus.FAILED
+    assert {(run.connector, run.status) for run in event.runs.all()} == {
+        ("FailingConnector", WebhookEventStatus.FAILED),
+        ("FakeConnector", WebhookEventStatus.PROCESSED),
+    }
+    failed_run = event.runs.get(connector="FailingConnector")
+    assert failed_run.exception == "ValueError('boom')"
+    assert "ValueError: boom" in failed_run.traceback
+    assert failed_run.duration is not None
+    assert failed_run.started_at is not None
+    assert event.exception == "FailingConnector: ValueError('boom')"
+    assert "ValueError: boom" in event.traceback
+    assert event.completed_at is not None
+
+
+@pytest.mark.django_db
+def test_event_pending_until_all_runs_finished(eager_webhook_event_runs, make_fake_connector):
+    event = WebhookEventFactory(object_id=999)
+    eager_webhook_event_runs.side_effect = None
+
+    with patch(
+        "recoco_sync.main.connectors.connectors",
+        [make_fake_connector("A"), make_fake_connector("B")],
+    ):
+        process_webhook_event(event_id=event.id)
+        runs = list(event.runs.all())
+        assert eager_webhook_event_runs.call_count == 2
+
+        process_webhook_event_run(runs[0].id)
+        event.refresh_from_db()
+        assert event.status == WebhookEventStatus.PENDING
+
+        process_webhook_event_run(runs[1].id)
+        event.refresh_from_db()
+        assert event.status == WebhookEventStatus.PROCESSED
+
+
+@pytest.mark.django_db
+def test_survey_question_event_invalidates_catalogue(make_fake_connector):
+    event = WebhookEventFactory(object_id=85, object_type=ObjectType.SURVEY_QUESTION)
+
+    with (
+        patch("recoco_sync.main.connectors.connectors", [make_fake_connector()]),
+        patch("recoco_sync.main.tasks.invalidate_question_catalogue") as mock_invalidate,
+    ):
+        process_webhook_event(event_id=event.id)
+
+    mock_invalidate.assert_called_once_with(event.webhook_config.api_url)
+
+
+@pytest.mark.django_db
+def test_process_webhook_events(make_fake_connector):
+    first_event = WebhookEventFactory(object_id=999)
+    events = [first_event] + [
+        WebhookEventFactory(webhook_config=first_event.webhook_config, object_id=object_id)
+        for object_id in (999, 111)
+    ]
+    fake_connector = make_fake_connector()
+
+    with patch("recoco_sync.main.connectors.connectors", [fake_connector]):
+        process_webhook_events([event.id for event in events])
+
+    assert fake_connector.on_webhook_event.call_count == 2
+    assert [WebhookEvent.objects.get(id=event.id).status for event in events] == [
+        WebhookEventStatus.COALESCED,
+        WebhookEventStatus.PROCESSED,
+        WebhookEventStatus.PROCESSED,
+    ]
+
+
+def _age_events(*events: WebhookEvent, days: int) -> None:
+    WebhookEvent.objects.filter(id__in=[event.id for event in events]).update(
+        created=timezone.now() - timedelta(days=days)
+    )
+
+
+@pytest.mark.django_db
+def test_prune_webhook_events_command():
+    old_event = WebhookEventFactory(status=WebhookEventStatus.PROCESSED)
+    WebhookEventRun.objects.create(event=old_event, connector="FakeConnector")
+    old_pending_event = WebhookEventFactory()
+    recent_event = WebhookEventFactory(status=WebhookEventStatus.FAILED)
+    _age_events(old_event, old_pending_event, days=100)
+
+    out = StringIO()
+    call_command("prune_webhook_events", "--older-than-days=90", "--dry-run", stdout=out)
+    assert "1 webhook events would be deleted" in out.getvalue()
+    assert WebhookEvent.objects.count() == 3
+
+    out = StringIO()
+    call_command("prune_webhook_events", "--older-than-days=90", "--batch-size=1", stdout=out)
+    assert "1 webhook events deleted" in out.getvalue()
+
+    assert set(WebhookEvent.objects.values_list("id", flat=True)) == {
+        old_pending_event.id,
+        recent_event.id,
+    }
+    assert not WebhookEventRun.objects.exists()
+
+
+@pytest.mark.django_db
+def test_apply_webhook_events_retention(settings):
+    settings.WEBHOOK_EVENT_ARCHIVE_DAYS = 7
+    settings.WEBHOOK_EVENT_RETENTION_DAYS = 90
+    settings.WEBHOOK_EVENT_RETENTION_BATCH_SIZE = 2
+
+    expired_events = WebhookEventFactory.create_batch(3, status=WebhookEventStatus.PROCESSED)
+    archived_events = WebhookEventFactory.create_batch(
+        3, status=WebhookEventStatus.COALESCED, payload={"object": {"id": 1}}
+    )
+    recent_event = WebhookEventFactory(
+        status=WebhookEventStatus.PROCESSED, payload={"object": {"id": 2}}
+    )
+    _age_events(*expired_events, days=100)
+    _age_events(*archived_events, days=10)
+
+    apply_webhook_events_retention()
+
+    assert WebhookEvent.objects.count() == 4
+    for event in archived_events:
+        event.refresh_from_db()
+        assert event.is_archived
+        assert event.object_data == {"id": 1}
+    recent_event.refresh_from_db()
+    assert not recent_event.is_archived
+
+
+@pytest.mark.django_db
+def test_run_records_upstream_requests(respx_mock, make_fake_connector):
+    respx_mock.get("https://upstream.example.com/projects/").mock(
+        return_value=httpx.Response(200, json=[])
+    )
+    event = WebhookEventFactory(object_id=999)
+    client = get_http_client("upstream", base_url="https://upstream.example.com")
+    fake_connector = make_fake_connector()
+    fake_connector.on_webhook_event.side_effect = lambda **kwargs: [
+        client.get("/projects/") for _ in range(2)
+    ]
+
+    with patch("recoco_sync.main.connectors.connectors", [fake_connector]):
+        process_webhook_event(event_id=event.id)
+
+    run = event.runs.get()
+    assert run.status == WebhookEventStatus.PROCESSED
+    assert run.request_count == 2
+    assert run.traceback == ""
+    event.refresh_from_db()
+    assert event.status == WebhookEventStatus.PROCESSED
+    assert event.exception == ""
+
+
+@pytest.mark.django_db
+def test_unresolved_event_fails(make_fake_connector):
+    event = WebhookEventFactory(object_type=ObjectType.SURVEY_ANSWER, payload={"object": {}})
+
+    with patch("recoco_sync.main.connectors.connectors", [make_fake_connector()]):
+        process_webhook_event(event_id=event.id)
+
+    event.refresh_from_db()
+    assert event.status == WebhookEventStatus.FAILED
+    assert "TypeError" in event.exception
+    assert event.traceback
+    assert not event.runs.exists()
+
+
+@pytest.mark.django_db
+def test_unresolved_event_run_fails(make_fake_connector):
+    event = WebhookEventFactory(object_type=ObjectType.SURVEY_ANSWER, payload={"object": {}})
+    run = WebhookEventRun.objects.create(event=event, connector="FakeConnector")
+
+    with patch("recoco_sync.main.connectors.connectors", [make_fake_connector()]):
+        process_webhook_event_run(run.id)
+
+    run.refresh_from_db()
+    assert run.status == WebhookEventStatus.FAILED
+    assert "TypeError" in run.exception
+    event.refresh_from_db()
+    assert event.status == WebhookEventStatus.FAILED
+    assert event.completed_at is not None
+
+
+@pytest.mark.django_db
+def test_webhook_event_stats_command():
+    for connector, milliseconds in (
+        ("FakeConnector", 100),
+        ("FakeConnector", 200),
+        ("Connector300", 300),
+    ):
+        WebhookEventRun.objects.create(
+            event=WebhookEventFactory(
+                status=WebhookEventStatus.PROCESSED, completed_at=timezone.now()
+            ),
+            connector=connector,
+            status=WebhookEventStatus.PROCESSED,
+            duration=timedelta(milliseconds=milliseconds),
+            request_count=3,
+        )
+
+    out = StringIO()
+    call_command("webhook_event_stats", "--hours=1", stdout=out)
+
+    output = out.getvalue()
+    assert "PROCESSED=3" in output
+    assert "Events latency: p50=" in output
+    assert "FakeConnector: runs=2 failed=0 requests/run=3.0 p50=100ms p95=200ms p99=200ms" in output
+    assert "Connector300: runs=1 failed=0 requests/run=3.0 p50=300ms" in output
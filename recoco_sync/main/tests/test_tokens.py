@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import base64
+import json
+import time
+
+import httpx
+import pytest
+from django.conf import settings
+
+from recoco_sync.main.clients import RecocoApiClient
+from recoco_sync.main.tokens import (
+    CacheTokenStore,
+    InMemoryTokenStore,
+    Tokens,
+    get_token_expiry,
+    is_token_expiring,
+)
+
+
+def make_jwt(exp: float) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).rstrip(b"=")
+    return f"header.{payload.decode()}.signature"
+
+
+def test_get_token_expiry():
+    assert get_token_expiry(make_jwt(1234)) == 1234
+    assert get_token_expiry("opaque-token") is None
+    assert get_token_expiry(None) is None
+
+
+def test_is_token_expiring():
+    assert is_token_expiring(None) is True
+    assert is_token_expiring("opaque-token") is False
+    assert is_token_expiring(make_jwt(time.time() + 3600)) is False
+    assert is_token_expiring(make_jwt(time.time() + 10), leeway=60) is True
+
+
+def test_in_memory_token_store_evicts_least_recently_used():
+    store = InMemoryTokenStore(max_size=2)
+    store.set("a", Tokens("a"))
+    store.set("b", Tokens("b"))
+    store.get("a")
+    store.set("c", Tokens("c"))
+
+    assert store.get("a") == Tokens("a")
+    assert store.get("b") is None
+    assert store.get("c") == Tokens("c")
+
+
+def test_cache_token_store_is_shared():
+    CacheTokenStore().set("key", Tokens("access", "refresh"))
+    assert CacheTokenStore().get("key") == Tokens("access", "refresh")
+
+
+class TestTokenBearerAuth:
+    @pytest.fixture
+    def projects_route(self, respx_mock):
+        return respx_mock.get(f"{settings.RECOCO_API_URL_EXAMPLE}/projects/1/").mock(
+            return_value=httpx.Response(200, json={"id": 1})
+        )
+
+    def test_token_shared_across_clients(self, respx_mock, projects_route):
+        token_route = respx_mock.post(f"{settings.RECOCO_API_URL_EXAMPLE}/token/").mock(
+            return_value=httpx.Response(200, json={"access": "token"})
+        )
+
+        RecocoApiClient(api_url=settings.RECOCO_API_URL_EXAMPLE).get_project(project_id=1)
+        RecocoApiClient(api_url=settings.RECOCO_API_URL_EXAMPLE, timeout=60).get_project(
+            project_id=1
+        )
+
+        assert token_route.call_count == 1
+        assert projects_route.call_count == 2
+        assert projects_route.calls[1].request.headers["Authorization"] == "Bearer token"
+
+    def test_token_refreshed_before_expiry(self, respx_mock, projects_route):
+        expiring_token = make_jwt(time.time() + 5)
+        refresh_token = make_jwt(time.time() + 3600)
+        token_route = respx_mock.post(f"{settings.RECOCO_API_URL_EXAMPLE}/token/").mock(
+            return_value=httpx.Response(
+                200, json={"access": expiring_token, "refresh": refresh_token}
+            )
+        )
+        refresh_route = respx_mock.post(f"{settings.RECOCO_API_URL_EXAMPLE}/token/refresh/").mock(
+            return_value=httpx.Response(200, json={"access": "fresh-token"})
+        )
+
+        client = RecocoApiClient(api_url=settings.RECOCO_API_URL_EXAMPLE)
+        client.get_project(project_id=1)
+        client.get_project(project_id=1)
+
+        assert token_route.call_count == 1
+        assert refresh_route.call_count == 1
+        assert refresh_route.calls[0].request.content == f"refresh={refresh_token}".encode()
+        assert projects_route.calls[1].request.headers["Authorization"] == "Bearer fresh-token"
+
+
+def test_cache_token_store_lock_released_by_owner_only():
+    store = CacheTokenStore()
+    lock_key = f"{store.key_prefix}:key:lock"
+
+    with store.lock("key"):
+        assert store.cache.get(lock_key) is not None
+    assert store.cache.get(lock_key) is None
+
+    store.cache.set(lock_key, "other-process")
+    store.lock_timeout = 0
+    with store.lock("key"):
+        pass
+    assert store.cache.get(lock_key) == "other-process"
+    store.cache.delete(lock_key)
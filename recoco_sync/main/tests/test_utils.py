@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import threading
+import time
+
 import pytest
 
-from recoco_sync.main.utils import QuestionType, get_question_type
+from recoco_sync.main.utils import QuestionType, bounded_map, get_question_type
 
 
 @pytest.mark.parametrize(
@@ -97,3 +100,31 @@ from recoco_sync.main.utils import QuestionType, get_question_type
 )
 def test_get_column_type_from_payload(question_payload, expected_question_type):
     assert get_question_type(question_payload) == expected_question_type
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_bounded_map_keeps_order(max_workers):
+    def slow_square(value: int) -> int:
+        time.sleep(0.01 * (5 - value))
+        return value * value
+
+    assert list(bounded_map(slow_square, range(5), max_workers=max_workers)) == [0, 1, 4, 9, 16]
+
+
+def test_bounded_map_limits_in_flight_calls():
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def track(value: int) -> int:
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return value
+
+    assert list(bounded_map(track, range(20), max_workers=4)) == list(range(20))
+    assert 1 < max_in_flight <= 4
@@ -4,13 +4,22 @@ import hashlib
 import hmac
 import json
 from datetime import datetime
+from io import StringIO
 from json import JSONEncoder
 from typing import Any
+from unittest.mock import patch
 
+import httpx
 import pytest
+from asgiref.sync import async_to_sync
 from django.conf import settings
+from django.core.management import call_command
 from django.urls import reverse
 from django.utils import timezone
+from ninja.errors import HttpError
+
+from recoco_sync.main.models import WebhookEvent
+from recoco_sync.main.security import SignatureVerifier, read_signed_body
 
 from .factories import WebhookConfigFactory
 
@@ -61,6 +70,45 @@ def test_webhook_ok(client):
     assert resp.status_code == 200, resp.content
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "stored_headers,expected_headers",
+    [
+        (
+            ["Content-Type", "Django-Webhook-UUID"],
+            {"Content-Type", "Django-Webhook-Uuid"},
+        ),
+        (
+            ["*"],
+            {
+                "Content-Type",
+                "Content-Length",
+                "Cookie",
+                "Django-Webhook-Uuid",
+                "Django-Webhook-Request-Timestamp",
+                "Django-Webhook-Signature-V1",
+            },
+        ),
+    ],
+)
+def test_webhook_compact_storage(client, settings, stored_headers, expected_headers):
+    settings.WEBHOOK_STORED_HEADERS = stored_headers
+    webhook_config = WebhookConfigFactory()
+
+    resp = client.post(
+        reverse("api:webhook", kwargs={"code": webhook_config.code}),
+        headers=_webhook_headers(default_payload, default_headers),
+        data=default_payload,
+        content_type="application/json",
+    )
+    assert resp.status_code == 200, resp.content
+
+    event = WebhookEvent.objects.get()
+    assert event.payload == {"object": default_payload["object"]}
+    assert event.object_data == default_payload["object"]
+    assert set(event.headers) == expected_headers
+
+
 @pytest.mark.django_db
 def test_invalid_signature(client):
     webhook_config = WebhookConfigFactory()
@@ -72,3 +120,194 @@ def test_invalid_signature(client):
         content_type="application/json",
     )
     assert resp.status_code == 401, resp.content
+
+
+@pytest.mark.django_db
+def test_webhook_async_ok(async_client):
+    webhook_config = WebhookConfigFactory()
+
+    resp = async_to_sync(async_client.post)(
+        reverse("api:webhook_async", kwargs={"code": webhook_config.code}),
+        headers=_webhook_headers(default_payload, default_headers),
+        data=default_payload,
+        content_type="application/json",
+    )
+    assert resp.status_code == 200, resp.content
+
+    event = WebhookEvent.objects.get(id=resp.json()["id"])
+    assert event.object_id == "9"
+    assert event.webhook_config == webhook_config
+    assert event.dispatched_at is None
+
+
+@pytest.mark.django_db
+def test_webhook_async_invalid_signature(async_client):
+    webhook_config = WebhookConfigFactory()
+
+    resp = async_to_sync(async_client.post)(
+        reverse("api:webhook_async", kwargs={"code": webhook_config.code}),
+        headers=_webhook_headers(default_payload, default_headers, secret="wrong-secret"),
+        data=default_payload,
+        content_type="application/json",
+    )
+    assert resp.status_code == 401, resp.content
+    assert not WebhookEvent.objects.exists()
+
+
+@pytest.mark.django_db
+def test_webhook_async_disabled(async_client):
+    webhook_config = WebhookConfigFactory(enabled=False)
+
+    resp = async_to_sync(async_client.post)(
+        reverse("api:webhook_async", kwargs={"code": webhook_config.code}),
+        headers=_webhook_headers(default_payload, default_headers),
+        data=default_payload,
+        content_type="application/json",
+    )
+    assert resp.status_code == 200, resp.content
+    assert resp.json()["message"] == "Webhook is disabled"
+
+
+def test_loadtest_webhook_command(respx_mock):
+    route = respx_mock.post(url__regex=r"http://testserver/api/(async/)?webhook/CODE").mock(
+        return_value=httpx.Response(200, json={})
+    )
+    out = StringIO()
+
+    call_command("loadtest_webhook", "CODE", base_url="http://testserver", requests=5, stdout=out)
+
+    assert route.call_count == 10
+    assert "sync: " in out.getvalue()
+    assert "async: " in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_webhook_batch_ok(client, django_capture_on_commit_callbacks):
+    webhook_config = WebhookConfigFactory()
+    payload = [
+        default_payload | {"object": default_payload["object"] | {"id": object_id}}
+        for object_id in (9, 10, 11)
+    ]
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        resp = client.post(
+            reverse("api:webhook_batch", kwargs={"code": webhook_config.code}),
+            headers=_webhook_headers(payload, default_headers),
+            data=payload,
+            content_type="application/json",
+        )
+    assert resp.status_code == 200, resp.content
+    assert not callbacks
+
+    events = WebhookEvent.objects.filter(webhook_config=webhook_config)
+    assert sorted(events.values_list("object_id", flat=True)) == ["10", "11", "9"]
+    assert {str(event_id) for event_id in resp.json()["ids"]} == {str(e.id) for e in events}
+
+
+@pytest.mark.django_db
+def test_webhook_batch_too_large(client, settings):
+    settings.WEBHOOK_BATCH_MAX_SIZE = 1
+    webhook_config = WebhookConfigFactory()
+    payload = [default_payload, default_payload]
+
+    resp = client.post(
+        reverse("api:webhook_batch", kwargs={"code": webhook_config.code}),
+        headers=_webhook_headers(payload, default_headers),
+        data=payload,
+        content_type="application/json",
+    )
+    assert resp.status_code == 413, resp.content
+    assert not WebhookEvent.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "signing_secret,accepted_secrets,expected_status_code",
+    [
+        ("old-secret", ["old-secret"], 200),
+        ("old-secret", [], 401),
+        ("unknown-secret", ["old-secret"], 401),
+    ],
+)
+def test_webhook_secret_rotation(
+    client, settings, signing_secret, accepted_secrets, expected_status_code
+):
+    settings.WEBHOOK_SECRETS = accepted_secrets
+    webhook_config = WebhookConfigFactory()
+
+    resp = client.post(
+        reverse("api:webhook", kwargs={"code": webhook_config.code}),
+        headers=_webhook_headers(default_payload, default_headers, secret=signing_secret),
+        data=default_payload,
+        content_type="application/json",
+    )
+    assert resp.status_code == expected_status_code, resp.content
+
+
+@pytest.mark.django_db
+def test_webhook_several_signatures(client):
+    webhook_config = WebhookConfigFactory()
+    headers = _webhook_headers(default_payload, default_headers)
+    headers["Django-Webhook-Signature-v1"] = f"{'0' * 64},{headers['Django-Webhook-Signature-v1']}"
+
+    resp = client.post(
+        reverse("api:webhook", kwargs={"code": webhook_config.code}),
+        headers=headers,
+        data=default_payload,
+        content_type="application/json",
+    )
+    assert resp.status_code == 200, resp.content
+
+
+@pytest.mark.django_db
+def test_webhook_stale_timestamp(client):
+    webhook_config = WebhookConfigFactory()
+
+    with patch("recoco_sync.main.security.SignatureVerifier") as mock_verifier:
+        resp = client.post(
+            reverse("api:webhook", kwargs={"code": webhook_config.code}),
+            headers=_webhook_headers(default_payload, default_headers)
+            | {"Django-Webhook-Request-Timestamp": "1000000000"},
+            data=default_payload,
+            content_type="application/json",
+        )
+    assert resp.status_code == 401, resp.content
+    mock_verifier.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_webhook_body_too_large(client, settings):
+    settings.WEBHOOK_MAX_BODY_SIZE = 10
+    webhook_config = WebhookConfigFactory()
+
+    resp = client.post(
+        reverse("api:webhook", kwargs={"code": webhook_config.code}),
+        headers=_webhook_headers(default_payload, default_headers),
+        data=default_payload,
+        content_type="application/json",
+    )
+    assert resp.status_code == 413, resp.content
+
+
+def test_read_signed_body(rf, settings):
+    settings.WEBHOOK_MAX_BODY_SIZE = 10
+    body = b"0123456789"
+    signature = hmac.new(
+        key=settings.WEBHOOK_SECRET.encode(), msg=b"1000:" + body, digestmod=hashlib.sha256
+    ).hexdigest()
+
+    request = rf.post("/", data=body, content_type="application/json")
+    verifier = SignatureVerifier("1000")
+    with patch("recoco_sync.main.security.BODY_CHUNK_SIZE", 3):
+        read_signed_body(request, verifier)
+    assert verifier.verify(signature)
+    # the body is still available to parse the payload
+    assert request.body == body
+
+    request = rf.post("/", data=body + b"0", content_type="application/json")
+    with (
+        patch("recoco_sync.main.security.BODY_CHUNK_SIZE", 3),
+        pytest.raises(HttpError) as exc_info,
+    ):
+        read_signed_body(request, SignatureVerifier("1000"))
+    assert exc_info.value.status_code == 413
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+import threading
+import time
+import uuid
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+from collections.abc import Generator
+from contextlib import contextmanager
+from functools import cache
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+class Tokens(NamedTuple):
+    access: str
+    refresh: str | None = None
+
+
+def get_token_expiry(token: str | None) -> float | None:
+    """Read the `exp` claim of a JWT, without verifying it. Return None for opaque tokens."""
+
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError, binascii.Error):
+        return None
+
+
+def is_token_expiring(token: str | None, leeway: float | None = None) -> bool:
+    if token is None:
+        return True
+    if (expiry := get_token_expiry(token)) is None:
+        return False
+    if leeway is None:
+        leeway = settings.TOKEN_REFRESH_LEEWAY
+    return expiry - leeway <= time.time()
+
+
+class TokenStore(metaclass=ABCMeta):
+    """Store the tokens of the API clients, keyed by credentials."""
+
+    def __init__(self):
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    @abstractmethod
+    def get(self, key: str) -> Tokens | None:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, tokens: Tokens) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    @contextmanager
+    def lock(self, key: str) -> Generator[None]:
+        """Serialise token refreshes for a given key, within the current process."""
+
+        with self._locks_lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            yield
+
+    @staticmethod
+    def get_timeout(tokens: Tokens) -> float | None:
+        expiry = get_token_expiry(tokens.refresh) or get_token_expiry(tokens.access)
+        return None if expiry is None else max(expiry - time.time(), 0)
+
+
+class InMemoryTokenStore(TokenStore):
+    """Least recently used tokens of the current process."""
+
+    def __init__(self, max_size: int | None = None):
+        super().__init__()
+        self.max_size = max_size or settings.TOKEN_STORE_MAX_SIZE
+        self._tokens: OrderedDict[str, Tokens] = OrderedDict()
+        self._tokens_lock = threading.Lock()
+
+    def get(self, key: str) -> Tokens | None:
+        with self._tokens_lock:
+            if (tokens := self._tokens.get(key)) is not None:
+                self._tokens.move_to_end(key)
+            return tokens
+
+    def set(self, key: str, tokens: Tokens) -> None:
+        with self._tokens_lock:
+            self._tokens[key] = tokens
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._tokens_lock:
+            self._tokens.clear()
+
+
+class CacheTokenStore(InMemoryTokenStore):
+    """
+    Tokens shared across processes through the Django cache, with the in-memory store
+    as a first level. Refreshes are serialised across processes with a cache lock.
+    """
+
+    key_prefix = "recoco-sync:token"
+    lock_timeout = 30
+
+    @property
+    def cache(self):
+        return caches[settings.TOKEN_STORE_CACHE_ALIAS]
+
+    def get(self, key: str) -> Tokens | None:
+        tokens = super().get(key)
+        if tokens is None or is_token_expiring(tokens.access):
+            if (cached := self.cache.get(f"{self.key_prefix}:{key}")) is not None:
+                tokens = Tokens(*cached)
+                super().set(key, tokens)
+        return tokens
+
+    def set(self, key: str, tokens: Tokens) -> None:
+        super().set(key, tokens)
+        self.cache.set(f"{self.key_prefix}:{key}", tuple(tokens), self.get_timeout(tokens))
+
+    @contextmanager
+    def lock(self, key: str) -> Generator[None]:
+        """
+        Hold the cache lock of the key while refreshing its tokens. If it cannot be acquired
+        before `lock_timeout`, go on without it: the refresh may then be duplicated, but the
+        lock of the other process is left untouched.
+        """
+
+        lock_key = f"{self.key_prefix}:{key}:lock"
+        owner = uuid.uuid4().hex
+        with super().lock(key):
+            deadline = time.monotonic() + self.lock_timeout
+            acquired = self.cache.add(lock_key, owner, self.lock_timeout)
+            while not acquired and time.monotonic() < deadline:
+                time.sleep(0.1)
+                acquired = self.cache.add(lock_key, owner, self.lock_timeout)
+            try:
+                yield
+            finally:
+                if acquired and self.cache.get(lock_key) == owner:
+                    self.cache.delete(lock_key)
+
+
+@cache
+def get_token_store() -> TokenStore:
+    return import_string(settings.TOKEN_STORE_CLASS)()
+
+
+def get_token_key(*credentials: str) -> str:
+    return hashlib.sha256(":".join(credentials).encode()).hexdigest()
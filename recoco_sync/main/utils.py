@@ -1,6 +1,11 @@
 from __future__ import annotations
 
+import contextvars
+from collections import deque
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
+from itertools import islice
 from typing import Any
 
 
@@ -28,3 +33,38 @@ def get_question_type(question: dict[str, Any]) -> QuestionType:
         return QuestionType.YES_NO_MAYBE
 
     return QuestionType.CHOICES
+
+
+def bounded_map(
+    func: Callable[[Any], Any], iterable: Iterable[Any], max_workers: int
+) -> Generator[Any]:
+    """
+    Apply func to each item of iterable in a thread pool, keeping at most max_workers calls
+    in flight, and yield the results in the order of the input items.
+    """
+
+    if max_workers <= 1:
+        yield from map(func, iterable)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending: deque[Future] = deque()
+    try:
+        for item in iterable:
+            # each call runs in a copy of the caller context, e.g. to count its requests
+            pending.append(executor.submit(contextvars.copy_context().run, func, item))
+            if len(pending) >= max_workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def chunked(iterable: Iterable[Any], size: int) -> Generator[list[Any]]:
+    """Split iterable into lists of at most size items."""
+
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
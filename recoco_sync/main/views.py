@@ -1,25 +1,23 @@
 from __future__ import annotations
 
-from functools import partial
+from typing import Any
 
-from django.db import transaction
+from django.conf import settings
 from django.http import HttpRequest
 from ninja import Router
+from ninja.errors import HttpError
 
 from .choices import WebhookEventStatus
-from .models import WebhookConfig, WebhookEvent
+from .lookups import WebhookConfigEntry, webhook_config_cache
+from .models import WebhookEvent
 from .schemas import WebhookEventSchema
-from .security import SecurityAuth
-from .triggers import on_webhook_event_commit
+from .security import AsyncSecurityAuth, SecurityAuth
 
 router = Router()
 
 
-@router.post("/webhook/{code}", auth=SecurityAuth())
-def webhook(request: HttpRequest, code: str, payload: WebhookEventSchema):
-    try:
-        config = WebhookConfig.objects.get(code=code)
-    except WebhookConfig.DoesNotExist:
+def _check_webhook_config(config: WebhookConfigEntry | None) -> dict[str, Any] | None:
+    if config is None:
         return {
             "id": None,
             "status": WebhookEventStatus.INVALID,
@@ -31,23 +29,73 @@ def webhook(request: HttpRequest, code: str, payload: WebhookEventSchema):
             "status": WebhookEventStatus.INVALID,
             "message": "Webhook is disabled",
         }
+    return None
+
 
+def _get_event_data(config: WebhookConfigEntry, payload: WebhookEventSchema) -> dict[str, Any]:
     event_data = payload.dict()
     inner_obj = event_data.pop("object")
     event_data.update(
         {
             "object_id": inner_obj["id"],
             "webhook_config_id": config.id,
-            "payload": payload.dict(),
+            # the other fields of the payload are already stored in their own columns
+            "payload": {"object": inner_obj},
         }
     )
+    return event_data
 
-    with transaction.atomic():
-        event = WebhookEvent.create_from_request(request, **event_data)
-        transaction.on_commit(partial(on_webhook_event_commit, event=event))
 
+def _event_created_response(event: WebhookEvent) -> dict[str, Any]:
     return {
         "id": event.id,
         "status": event.status,
         "message": "Webhook event created",
     }
+
+
+@router.post("/webhook/{code}", auth=SecurityAuth())
+def webhook(request: HttpRequest, code: str, payload: WebhookEventSchema):
+    config = webhook_config_cache.get(code)
+    if (error := _check_webhook_config(config)) is not None:
+        return error
+
+    # the event is published to the task queue by the outbox relay
+    event = WebhookEvent.create_from_request(request, **_get_event_data(config, payload))
+
+    return _event_created_response(event)
+
+
+@router.post("/webhook/{code}/batch", auth=SecurityAuth(), url_name="webhook_batch")
+def webhook_batch(request: HttpRequest, code: str, payload: list[WebhookEventSchema]):
+    """Receive several events under a single signature, inserted at once."""
+
+    config = webhook_config_cache.get(code)
+    if (error := _check_webhook_config(config)) is not None:
+        return error | {"ids": []}
+
+    if len(payload) > settings.WEBHOOK_BATCH_MAX_SIZE:
+        raise HttpError(413, f"Too many events, the maximum is {settings.WEBHOOK_BATCH_MAX_SIZE}")
+
+    events = WebhookEvent.bulk_create_from_request(
+        request, [_get_event_data(config, event_payload) for event_payload in payload]
+    )
+
+    return {
+        "ids": [event.id for event in events],
+        "status": WebhookEventStatus.PENDING,
+        "message": f"{len(events)} webhook events created",
+    }
+
+
+@router.post("/async/webhook/{code}", auth=AsyncSecurityAuth(), url_name="webhook_async")
+async def webhook_async(request: HttpRequest, code: str, payload: WebhookEventSchema):
+    """Same as webhook, without holding a worker thread while waiting for the database."""
+
+    config = await webhook_config_cache.aget(code)
+    if (error := _check_webhook_config(config)) is not None:
+        return error
+
+    event = await WebhookEvent.acreate_from_request(request, **_get_event_data(config, payload))
+
+    return _event_created_response(event)
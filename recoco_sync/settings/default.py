@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from celery.schedules import crontab
 from environ import Env
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -125,6 +126,12 @@ STORAGES = {
     },
 }
 
+#
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
 #
 # Celery Configuration Options
 # https://docs.celeryproject.org/en/stable/userguide/configuration.html
@@ -136,22 +143,119 @@ CELERY_BROKER_URL = env.str("BROKER_URL")
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 CELERY_ALWAYS_EAGER = env.bool("CELERY_ALWAYS_EAGER", default=False)
 CELERY_RESULT_BACKEND = "django-db"
+CELERY_BEAT_SCHEDULE = {
+    "refresh-grist-tables": {
+        "task": "recoco_sync.grist_connector.tasks.refresh_grist_tables",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    "apply-webhook-events-retention": {
+        "task": "recoco_sync.main.tasks.apply_webhook_events_retention",
+        "schedule": crontab(hour=3, minute=0),
+    },
+}
+
+#
+# HTTP clients, shared per upstream API
+#
+# Opt-in, requires the h2 package (pip install "httpx[http2]")
+HTTP_CLIENT_HTTP2 = env.bool("HTTP_CLIENT_HTTP2", default=False)
+HTTP_CLIENT_MAX_CONNECTIONS = env.int("HTTP_CLIENT_MAX_CONNECTIONS", default=20)
+HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS = env.int("HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS", default=10)
+HTTP_CLIENT_KEEPALIVE_EXPIRY = env.float("HTTP_CLIENT_KEEPALIVE_EXPIRY", default=30.0)
+# Rate limits per upstream host, shared by the workers through the cache
+RATE_LIMIT_CACHE_ALIAS = env.str("RATE_LIMIT_CACHE_ALIAS", default="default")
+# Retries of the requests rejected with 429, waiting for their Retry-After (capped)
+RATE_LIMIT_MAX_RETRIES = env.int("RATE_LIMIT_MAX_RETRIES", default=3)
+RATE_LIMIT_MAX_RETRY_AFTER = env.float("RATE_LIMIT_MAX_RETRY_AFTER", default=60.0)
+
+#
+# API tokens store, shared by the HTTP clients
+#
+TOKEN_STORE_CLASS = env.str(
+    "TOKEN_STORE_CLASS", default="recoco_sync.main.tokens.InMemoryTokenStore"
+)
+TOKEN_STORE_MAX_SIZE = env.int("TOKEN_STORE_MAX_SIZE", default=128)
+TOKEN_STORE_CACHE_ALIAS = env.str("TOKEN_STORE_CACHE_ALIAS", default="default")
+TOKEN_REFRESH_LEEWAY = env.int("TOKEN_REFRESH_LEEWAY", default=60)
+
+#
+# Survey questions catalogue, cached per Recoco instance
+#
+# Shared by the workers (e.g. Redis), which are notified of the changes of the questions
+QUESTION_CATALOGUE_CACHE_ALIAS = env.str("QUESTION_CATALOGUE_CACHE_ALIAS", default="default")
+QUESTION_CATALOGUE_TIMEOUT = env.int("QUESTION_CATALOGUE_TIMEOUT", default=3600)
 
 #
 # Webhook security
 #
 WEBHOOK_SECRET = env.str("WEBHOOK_SECRET")
+# Former secrets still accepted while rotating WEBHOOK_SECRET
+WEBHOOK_SECRETS = env.list("WEBHOOK_SECRETS", default=[])
+# Maximum age (in seconds) of a signed request, 0 to disable the check
+WEBHOOK_TIMESTAMP_TOLERANCE = env.int("WEBHOOK_TIMESTAMP_TOLERANCE", default=300)
+WEBHOOK_MAX_BODY_SIZE = env.int("WEBHOOK_MAX_BODY_SIZE", default=2 * 1024 * 1024)
+
+#
+# Webhook events storage
+#
+# Request headers stored along with the events, "*" to store them all
+WEBHOOK_STORED_HEADERS = env.list(
+    "WEBHOOK_STORED_HEADERS",
+    default=[
+        "Content-Type",
+        "User-Agent",
+        "Django-Webhook-UUID",
+        "Django-Webhook-Request-Timestamp",
+    ],
+)
+# Compression of the archived payloads: "zlib", or "zstd" when available
+WEBHOOK_ARCHIVE_CODEC = env.str("WEBHOOK_ARCHIVE_CODEC", default="zlib")
+# Processed events are compressed, then deleted, after these numbers of days
+WEBHOOK_EVENT_ARCHIVE_DAYS = env.int("WEBHOOK_EVENT_ARCHIVE_DAYS", default=7)
+WEBHOOK_EVENT_RETENTION_DAYS = env.int("WEBHOOK_EVENT_RETENTION_DAYS", default=90)
+WEBHOOK_EVENT_RETENTION_BATCH_SIZE = env.int("WEBHOOK_EVENT_RETENTION_BATCH_SIZE", default=1000)
+
+#
+# Webhook events processing
+#
+# Delay (in seconds) before processing an event, during which the following events
+# related to the same object are coalesced into a single connectors run
+WEBHOOK_COALESCING_WINDOW = env.int("WEBHOOK_COALESCING_WINDOW", default=10)
+# Outbox relay publishing the pending events to the task queue
+WEBHOOK_OUTBOX_BATCH_SIZE = env.int("WEBHOOK_OUTBOX_BATCH_SIZE", default=100)
+WEBHOOK_OUTBOX_POLL_INTERVAL = env.float("WEBHOOK_OUTBOX_POLL_INTERVAL", default=1.0)
+WEBHOOK_OUTBOX_REDELIVERY_TIMEOUT = env.int("WEBHOOK_OUTBOX_REDELIVERY_TIMEOUT", default=600)
+# Delay (in seconds) after which the in-memory index of the webhook configs is reloaded
+WEBHOOK_CONFIG_CACHE_TIMEOUT = env.int("WEBHOOK_CONFIG_CACHE_TIMEOUT", default=60)
+# Maximum number of events accepted in a single request by the batch endpoint
+WEBHOOK_BATCH_MAX_SIZE = env.int("WEBHOOK_BATCH_MAX_SIZE", default=500)
+# Cache of the Recoco payloads fetched while processing an event, shared by the connectors
+# (each one runs in its own task, so it has to be shared by the workers, e.g. Redis)
+WEBHOOK_HYDRATION_CACHE_ALIAS = env.str("WEBHOOK_HYDRATION_CACHE_ALIAS", default="default")
+WEBHOOK_HYDRATION_CACHE_TIMEOUT = env.int("WEBHOOK_HYDRATION_CACHE_TIMEOUT", default=300)
 
 #
 # Recoco API congiguration
 #
 RECOCO_API_USERNAME = env.str("RECOCO_API_USERNAME")
 RECOCO_API_PASSWORD = env.str("RECOCO_API_PASSWORD")
+RECOCO_API_MAX_CONCURRENCY = env.int("RECOCO_API_MAX_CONCURRENCY", default=8)
+RECOCO_API_PAGE_SIZE = env.int("RECOCO_API_PAGE_SIZE", default=100)
+RECOCO_API_BULK_HYDRATION = env.bool("RECOCO_API_BULK_HYDRATION", default=True)
+# Requests per second, 0 to disable the rate limit
+RECOCO_API_RATE_LIMIT = env.float("RECOCO_API_RATE_LIMIT", default=20.0)
+RECOCO_API_RATE_LIMIT_BURST = env.int("RECOCO_API_RATE_LIMIT_BURST", default=20)
 
 #
 # Grist
 #
 TABLE_COLUMN_HEADER_MAX_LENGTH = env.str("TABLE_COLUMN_HEADER_MAX_LENGTH", default=80)
+GRIST_BATCH_SIZE = env.int("GRIST_BATCH_SIZE", default=100)
+GRIST_BATCH_MAX_SIZE = env.int("GRIST_BATCH_MAX_SIZE", default=500)
+GRIST_BATCH_MAX_BYTES = env.int("GRIST_BATCH_MAX_BYTES", default=1024 * 1024)
+# Default requests per second of the Grist configs, 0 to disable the rate limit
+GRIST_API_RATE_LIMIT = env.float("GRIST_API_RATE_LIMIT", default=10.0)
+GRIST_API_RATE_LIMIT_BURST = env.int("GRIST_API_RATE_LIMIT_BURST", default=10)
 
 #
 # LesCommuns
@@ -159,6 +263,9 @@ TABLE_COLUMN_HEADER_MAX_LENGTH = env.str("TABLE_COLUMN_HEADER_MAX_LENGTH", defau
 LESCOMMUNS_API_URL = env.str("LESCOMMUNS_API_URL")
 LESCOMMUNS_API_USERNAME = env.str("LESCOMMUNS_API_USERNAME")
 LESCOMMUNS_API_PASSWORD = env.str("LESCOMMUNS_API_PASSWORD")
+# Default requests per second of the LesCommuns configs, 0 to disable the rate limit
+LESCOMMUNS_API_RATE_LIMIT = env.float("LESCOMMUNS_API_RATE_LIMIT", default=5.0)
+LESCOMMUNS_API_RATE_LIMIT_BURST = env.int("LESCOMMUNS_API_RATE_LIMIT_BURST", default=5)
 
 LESCOMMUNS_PROJECT_SELECTION_ENABLED = env.bool(
     "LESCOMMUNS_PROJECT_SELECTION_ENABLED", default=True
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+import zlib
+from importlib import import_module
+from importlib.util import find_spec
+from typing import Any
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# one byte header identifying the codec of a compressed blob
+_ZLIB_HEADER = b"z"
+_ZSTD_HEADER = b"s"
+
+
+def _get_zstd_module():
+    """zstd comes with the standard library from Python 3.14, or with the zstandard package."""
+
+    if find_spec("compression") and find_spec("compression.zstd"):
+        return import_module("compression.zstd")
+    if find_spec("zstandard"):
+        return import_module("zstandard")
+    return None
+
+
+def is_zstd_available() -> bool:
+    return _get_zstd_module() is not None
+
+
+def compress_json(value: Any, codec: str = "zlib") -> bytes:
+    data = json.dumps(value, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+    if codec == "zstd":
+        if (zstd := _get_zstd_module()) is None:
+            raise ValueError("zstd compression is not available")
+        return _ZSTD_HEADER + zstd.compress(data)
+    if codec == "zlib":
+        return _ZLIB_HEADER + zlib.compress(data, level=9)
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+def decompress_json(blob: bytes | memoryview) -> Any:
+    blob = bytes(blob)
+    header, data = blob[:1], blob[1:]
+
+    if header == _ZSTD_HEADER:
+        if (zstd := _get_zstd_module()) is None:
+            raise ValueError("zstd compression is not available")
+        return json.loads(zstd.decompress(data))
+    if header == _ZLIB_HEADER:
+        return json.loads(zlib.decompress(data))
+    raise ValueError("Unknown compression header")
@@ -5,3 +5,5 @@ from functools import partial
 from django.core.serializers.json import DjangoJSONEncoder
 
 PrettyJSONEncoder = partial(DjangoJSONEncoder, indent=2, sort_keys=True)
+
+CompactJSONEncoder = partial(DjangoJSONEncoder, separators=(",", ":"))
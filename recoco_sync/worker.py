@@ -3,9 +3,20 @@ from __future__ import annotations
 import os
 
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "recoco_sync.settings.dev")
 
 app = Celery("recoco-sync")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+@worker_process_init.connect
+@worker_process_shutdown.connect
+def reset_http_clients(**kwargs):
+    """Do not share pooled connections with forked processes, and close them on exit."""
+
+    from recoco_sync.main.clients import close_http_clients
+
+    close_http_clients()